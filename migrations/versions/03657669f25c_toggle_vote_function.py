@@ -0,0 +1,75 @@
+"""toggle vote function
+
+Revision ID: 03657669f25c
+Revises: bb8930d8aaed
+Create Date: 2026-10-18 19:05:31.204518
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "03657669f25c"
+down_revision = "bb8930d8aaed"
+branch_labels = None
+depends_on = None
+
+
+# Post row is locked first, so concurrent votes for the post run one by one
+# and every statement below sees votes committed before the lock was taken.
+TOGGLE_VOTE = """
+CREATE FUNCTION toggle_vote(
+    vote_post_id integer, vote_user_id integer, new_vote votetype
+)
+RETURNS TABLE (status text, voted votetype, likes integer, dislikes integer)
+LANGUAGE plpgsql AS $$
+DECLARE
+    post_owner_id integer;
+    old_vote votetype;
+    final_vote votetype;
+BEGIN
+    SELECT owner_id INTO post_owner_id FROM posts
+    WHERE id = vote_post_id FOR NO KEY UPDATE;
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'missing', NULL::votetype, NULL::integer, NULL::integer;
+        RETURN;
+    END IF;
+    IF post_owner_id = vote_user_id THEN
+        RETURN QUERY SELECT 'own', NULL::votetype, NULL::integer, NULL::integer;
+        RETURN;
+    END IF;
+
+    SELECT vote_type INTO old_vote FROM votes
+    WHERE post_id = vote_post_id AND user_id = vote_user_id;
+
+    IF old_vote = new_vote THEN
+        DELETE FROM votes WHERE post_id = vote_post_id AND user_id = vote_user_id;
+        final_vote := NULL;
+    ELSE
+        INSERT INTO votes (post_id, user_id, vote_type)
+        VALUES (vote_post_id, vote_user_id, new_vote)
+        ON CONFLICT (post_id, user_id) DO UPDATE SET vote_type = EXCLUDED.vote_type;
+        final_vote := new_vote;
+    END IF;
+
+    RETURN QUERY
+    UPDATE posts SET
+        like_count = posts.like_count
+            + (final_vote IS NOT DISTINCT FROM 'LIKE')::integer
+            - (old_vote IS NOT DISTINCT FROM 'LIKE')::integer,
+        dislike_count = posts.dislike_count
+            + (final_vote IS NOT DISTINCT FROM 'DISLIKE')::integer
+            - (old_vote IS NOT DISTINCT FROM 'DISLIKE')::integer
+    WHERE id = vote_post_id
+    RETURNING 'ok', final_vote, posts.like_count, posts.dislike_count;
+END;
+$$
+"""
+
+
+def upgrade() -> None:
+    op.execute(TOGGLE_VOTE)
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION toggle_vote(integer, integer, votetype)")
@@ -0,0 +1,32 @@
+"""user post count
+
+Revision ID: 35f8267b07ec
+Revises: 3ad34c873905
+Create Date: 2026-10-18 19:58:02.371946
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "35f8267b07ec"
+down_revision = "3ad34c873905"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("post_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.execute(
+        "UPDATE users SET post_count = counts.posts "
+        "FROM (SELECT owner_id, count(*) AS posts FROM posts GROUP BY owner_id) "
+        "AS counts WHERE counts.owner_id = users.id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "post_count")
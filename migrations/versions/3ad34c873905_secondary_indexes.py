@@ -0,0 +1,32 @@
+"""secondary indexes
+
+Revision ID: 3ad34c873905
+Revises: 03657669f25c
+Create Date: 2026-10-18 19:31:47.660913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3ad34c873905"
+down_revision = "03657669f25c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_posts_owner_id_created_at",
+        "posts",
+        ["owner_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.create_index("ix_votes_post_id_vote_type", "votes", ["post_id", "vote_type"])
+    op.create_index("ix_votes_user_id", "votes", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_votes_user_id", table_name="votes")
+    op.drop_index("ix_votes_post_id_vote_type", table_name="votes")
+    op.drop_index("ix_posts_owner_id_created_at", table_name="posts")
@@ -0,0 +1,83 @@
+"""post last voted at
+
+Revision ID: 41f12ec4d156
+Revises: 35f8267b07ec
+Create Date: 2026-10-18 20:41:09.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "41f12ec4d156"
+down_revision = "35f8267b07ec"
+branch_labels = None
+depends_on = None
+
+
+# Same as in 03657669f25c, but also marks when post was voted last.
+TOGGLE_VOTE = """
+CREATE OR REPLACE FUNCTION toggle_vote(
+    vote_post_id integer, vote_user_id integer, new_vote votetype
+)
+RETURNS TABLE (status text, voted votetype, likes integer, dislikes integer)
+LANGUAGE plpgsql AS $$
+DECLARE
+    post_owner_id integer;
+    old_vote votetype;
+    final_vote votetype;
+BEGIN
+    SELECT owner_id INTO post_owner_id FROM posts
+    WHERE id = vote_post_id FOR NO KEY UPDATE;
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'missing', NULL::votetype, NULL::integer, NULL::integer;
+        RETURN;
+    END IF;
+    IF post_owner_id = vote_user_id THEN
+        RETURN QUERY SELECT 'own', NULL::votetype, NULL::integer, NULL::integer;
+        RETURN;
+    END IF;
+
+    SELECT vote_type INTO old_vote FROM votes
+    WHERE post_id = vote_post_id AND user_id = vote_user_id;
+
+    IF old_vote = new_vote THEN
+        DELETE FROM votes WHERE post_id = vote_post_id AND user_id = vote_user_id;
+        final_vote := NULL;
+    ELSE
+        INSERT INTO votes (post_id, user_id, vote_type)
+        VALUES (vote_post_id, vote_user_id, new_vote)
+        ON CONFLICT (post_id, user_id) DO UPDATE SET vote_type = EXCLUDED.vote_type;
+        final_vote := new_vote;
+    END IF;
+
+    RETURN QUERY
+    UPDATE posts SET
+        like_count = posts.like_count
+            + (final_vote IS NOT DISTINCT FROM 'LIKE')::integer
+            - (old_vote IS NOT DISTINCT FROM 'LIKE')::integer,
+        dislike_count = posts.dislike_count
+            + (final_vote IS NOT DISTINCT FROM 'DISLIKE')::integer
+            - (old_vote IS NOT DISTINCT FROM 'DISLIKE')::integer,
+        last_voted_at = now()
+    WHERE id = vote_post_id
+    RETURNING 'ok', final_vote, posts.like_count, posts.dislike_count;
+END;
+$$
+"""
+
+SET_LAST_VOTED_AT = """,
+        last_voted_at = now()"""
+
+
+def upgrade() -> None:
+    op.add_column(
+        "posts", sa.Column("last_voted_at", sa.TIMESTAMP(timezone=True), nullable=True)
+    )
+    op.execute(TOGGLE_VOTE)
+
+
+def downgrade() -> None:
+    op.execute(TOGGLE_VOTE.replace(SET_LAST_VOTED_AT, ""))
+    op.drop_column("posts", "last_voted_at")
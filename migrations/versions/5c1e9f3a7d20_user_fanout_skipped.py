@@ -0,0 +1,36 @@
+"""user fanout skipped
+
+Revision ID: 5c1e9f3a7d20
+Revises: 7b7de2944bf0
+Create Date: 2026-10-18 23:40:12.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5c1e9f3a7d20"
+down_revision = "7b7de2944bf0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column(
+            "fanout_skipped",
+            sa.Boolean(),
+            server_default=sa.text("false"),
+            nullable=False,
+        ),
+    )
+    # Posts of authors over the threshold, 10000 followers by default, were
+    # not fanned out. Those who already fell back under it can't be told
+    # apart, their posts stay missing.
+    op.execute("UPDATE users SET fanout_skipped = true WHERE follower_count > 10000")
+
+
+def downgrade() -> None:
+    op.drop_column("users", "fanout_skipped")
@@ -0,0 +1,55 @@
+"""post hot score
+
+Revision ID: 7b7de2944bf0
+Revises: 41f12ec4d156
+Create Date: 2026-10-18 21:12:37.402518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7b7de2944bf0"
+down_revision = "41f12ec4d156"
+branch_labels = None
+depends_on = None
+
+
+# Order of magnitude of net votes plus 1 per 12.5 hours of age, so a post
+# needs 10 times the votes to stay level with a post 12.5 hours younger.
+# Epoch does not depend on time zone, so the function is immutable and
+# can be used by a generated column.
+HOT_SCORE = """
+CREATE FUNCTION hot_score(
+    likes integer, dislikes integer, created_at timestamptz
+)
+RETURNS double precision
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+RETURN sign(likes - dislikes)::double precision
+    * log(greatest(abs(likes - dislikes), 1)::double precision)
+    + extract(epoch FROM created_at)::double precision / 45000
+"""
+
+
+def upgrade() -> None:
+    op.execute(HOT_SCORE)
+    op.add_column(
+        "posts",
+        sa.Column(
+            "hot_score",
+            sa.Double(),
+            sa.Computed(
+                "hot_score(like_count, dislike_count, created_at)", persisted=True
+            ),
+        ),
+    )
+    op.create_index(
+        "ix_posts_hot_score", "posts", [sa.text("hot_score DESC"), sa.text("id DESC")]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_posts_hot_score", table_name="posts")
+    op.drop_column("posts", "hot_score")
+    op.execute("DROP FUNCTION hot_score(integer, integer, timestamptz)")
@@ -0,0 +1,47 @@
+"""post vote counters
+
+Revision ID: 86c61e55c6f1
+Revises: 7ebb390e6f8b
+Create Date: 2026-10-18 17:30:12.412807
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "86c61e55c6f1"
+down_revision = "7ebb390e6f8b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "posts",
+        sa.Column("like_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "posts",
+        sa.Column("dislike_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.execute(
+        """
+        UPDATE posts
+        SET like_count = counts.likes, dislike_count = counts.dislikes
+        FROM (
+            SELECT
+                post_id,
+                count(*) FILTER (WHERE vote_type = 'LIKE') AS likes,
+                count(*) FILTER (WHERE vote_type = 'DISLIKE') AS dislikes
+            FROM votes
+            GROUP BY post_id
+        ) AS counts
+        WHERE posts.id = counts.post_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("posts", "dislike_count")
+    op.drop_column("posts", "like_count")
@@ -0,0 +1,52 @@
+"""posts search
+
+Revision ID: 8a0a853da138
+Revises: ccb8516641d4
+Create Date: 2026-10-18 17:52:44.305127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "8a0a853da138"
+down_revision = "ccb8516641d4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "posts",
+        sa.Column(
+            "content_tsv",
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('english', content)", persisted=True),
+        ),
+    )
+    op.create_index(
+        "ix_posts_content_tsv", "posts", ["content_tsv"], postgresql_using="gin"
+    )
+
+    # Trigram index serves substring search, but needs 'pg_trgm' extension,
+    # which is not shipped with every Postgres build.
+    has_trgm = op.get_bind().scalar(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    )
+    if has_trgm:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            "ix_posts_content_trgm",
+            "posts",
+            ["content"],
+            postgresql_using="gin",
+            postgresql_ops={"content": "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_posts_content_trgm")
+    op.drop_index("ix_posts_content_tsv", table_name="posts")
+    op.drop_column("posts", "content_tsv")
@@ -0,0 +1,70 @@
+"""follows and timelines
+
+Revision ID: bb8930d8aaed
+Revises: 8a0a853da138
+Create Date: 2026-10-18 18:40:12.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "bb8930d8aaed"
+down_revision = "8a0a853da138"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("follower_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.create_table(
+        "follows",
+        sa.Column("follower_id", sa.Integer(), nullable=False),
+        sa.Column("followee_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["follower_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["followee_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("follower_id", "followee_id"),
+    )
+    op.create_index("ix_follows_followee_id", "follows", ["followee_id"])
+    op.create_table(
+        "timeline_entries",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("post_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["post_id"], ["posts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "post_id"),
+    )
+    op.create_index(
+        "ix_timeline_entries_user_id_created_at",
+        "timeline_entries",
+        ["user_id", sa.text("created_at DESC"), sa.text("post_id DESC")],
+    )
+    op.create_index("ix_timeline_entries_post_id", "timeline_entries", ["post_id"])
+
+    # Every author sees own posts in the timeline.
+    op.execute(
+        "INSERT INTO timeline_entries (user_id, post_id, created_at) "
+        "SELECT owner_id, id, created_at FROM posts"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_timeline_entries_post_id", table_name="timeline_entries")
+    op.drop_index(
+        "ix_timeline_entries_user_id_created_at", table_name="timeline_entries"
+    )
+    op.drop_table("timeline_entries")
+    op.drop_index("ix_follows_followee_id", table_name="follows")
+    op.drop_table("follows")
+    op.drop_column("users", "follower_count")
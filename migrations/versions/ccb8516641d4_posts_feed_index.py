@@ -0,0 +1,28 @@
+"""posts feed index
+
+Revision ID: ccb8516641d4
+Revises: 86c61e55c6f1
+Create Date: 2026-10-18 17:41:05.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "ccb8516641d4"
+down_revision = "86c61e55c6f1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_posts_created_at_id",
+        "posts",
+        [sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_posts_created_at_id", table_name="posts")
@@ -1,15 +1,54 @@
+import os
 from argparse import ArgumentParser
 
 from uvicorn import run
 
-from .create_app import create_app
 
-arg_parser = ArgumentParser(description="Args with custom host and port settings.")
+arg_parser = ArgumentParser(description="Args with custom server settings.")
 arg_parser.add_argument("--host", dest="host", default="0.0.0.0")
 arg_parser.add_argument("--port", dest="port", default=8000, type=int)
-args = arg_parser.parse_args()
+arg_parser.add_argument(
+    "--workers",
+    dest="workers",
+    default=os.cpu_count() or 1,
+    type=int,
+    help="Number of worker processes, defaults to number of CPUs.",
+)
+arg_parser.add_argument(
+    "--loop", dest="loop", default="uvloop", choices=["auto", "asyncio", "uvloop"]
+)
+arg_parser.add_argument(
+    "--http", dest="http", default="httptools", choices=["auto", "h11", "httptools"]
+)
+arg_parser.add_argument(
+    "--keep-alive",
+    dest="keep_alive",
+    default=5,
+    type=int,
+    help="Seconds to keep idle connection open.",
+)
+arg_parser.add_argument(
+    "--backlog",
+    dest="backlog",
+    default=2048,
+    type=int,
+    help="Max number of connections waiting to be accepted.",
+)
 
 
 if __name__ == "__main__":
-    app = create_app()
-    run(app, host=args.host, port=args.port)
+    args = arg_parser.parse_args()
+    # Every worker imports the app by itself. On SIGTERM workers stop accepting
+    # connections, finish in-flight requests and run shutdown handlers, which
+    # dispose DB pools.
+    run(
+        "src.create_app:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=args.loop,
+        http=args.http,
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+    )
@@ -4,10 +4,16 @@ from loguru import logger
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db_models import User
+from src.cache import cache
+from src.db.session import release_connection
+from src.db_models import Post, User
+from src.oauth2.cache import known_user_key, known_users
 from src.oauth2.core import create_access_token
 from src.api_models import UserIn
 from src.api.auth.utils import hash_password, verify
+from src.api.events.utils import publish_invalidations
+from src.api.posts.utils import discard_user_votes, post_cache_key
+from src.api.users.utils import discard_user_follows
 
 
 async def create_user(user: UserIn, db: AsyncSession) -> User:
@@ -20,6 +26,7 @@ async def create_user(user: UserIn, db: AsyncSession) -> User:
     query = select(User).where(User.username == user.username)
     res = await db.execute(query)
     old_user = res.scalars().first()
+    await release_connection(db)
 
     if old_user is not None:
         logger.info(f"User {user.username} already exists.")
@@ -28,7 +35,7 @@ async def create_user(user: UserIn, db: AsyncSession) -> User:
             detail="Username is already taken",
         )
 
-    hashed_pass = hash_password(user.password)
+    hashed_pass = await hash_password(user.password)
     user.password = hashed_pass
 
     new_user = User(**user.dict())
@@ -43,10 +50,26 @@ async def create_user(user: UserIn, db: AsyncSession) -> User:
 async def delete_user(user_id: int, db: AsyncSession) -> None:
     """
     Deletes user from DB.
+
+    User's votes and follows are subtracted from posts' and users' counters
+    in the same transaction.
+    Cached posts of the user and posts the user voted for are invalidated,
+    and all workers forget the user was known.
     """
+    voted_post_ids = await discard_user_votes(user_id, db)
+    await discard_user_follows(user_id, db)
+    res = await db.execute(select(Post.id).where(Post.owner_id == user_id))
+    own_post_ids = res.scalars().all()
+
     query = delete(User).where(User.id == user_id)
     await db.execute(query)
+    cache_keys = [
+        post_cache_key(post_id) for post_id in [*voted_post_ids, *own_post_ids]
+    ]
+    await publish_invalidations([*cache_keys, known_user_key(user_id)], db)
     await db.commit()
+    known_users.discard(user_id)
+    await cache.invalidate(*cache_keys)
     logger.info(f"Deleted user with id: {user_id} from DB.")
 
 
@@ -57,6 +80,7 @@ async def get_token(
     query = select(User).where(User.username == user_credentials.username)
     res = await db.execute(query)
     user = res.scalars().first()
+    await release_connection(db)
 
     if not user:
         logger.info("Invalid Credentials")
@@ -65,7 +89,7 @@ async def get_token(
             detail="Invalid Credentials",
         )
 
-    if not verify(user_credentials.password, user.password):
+    if not await verify(user_credentials.password, user.password):
         logger.info("Invalid Credentials")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
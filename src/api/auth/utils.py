@@ -1,14 +1,65 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
+from src.metrics import observe_password_hash
+from src.settings import settings
+
+
+T = TypeVar("T")
 
 pass_context = CryptContext(["bcrypt"], deprecated="auto")
+hashing_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers, thread_name_prefix="password-hash"
+)
+hashing_calls = 0
+
+
+def timed(func: Callable[..., T], *args) -> tuple[T, float]:
+    """Calls 'func' and returns its result and duration in seconds."""
+    start = perf_counter()
+    result = func(*args)
+    return result, perf_counter() - start
+
+
+async def run_hashing(func: Callable[..., T], *args) -> T:
+    """
+    Runs CPU-heavy 'func' in hashing thread pool, so event loop is not blocked.
+
+    Raises 503 if pool is busy and 'password_hash_queue_size' calls are
+    already waiting for it.
+    """
+    global hashing_calls
+
+    limit = settings.password_hash_workers + settings.password_hash_queue_size
+    if hashing_calls >= limit:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later.",
+            headers={"Retry-After": "1"},
+        )
+
+    hashing_calls += 1
+    try:
+        loop = asyncio.get_running_loop()
+        result, seconds = await loop.run_in_executor(
+            hashing_executor, timed, func, *args
+        )
+        observe_password_hash(seconds)
+        return result
+    finally:
+        hashing_calls -= 1
 
 
-def hash_password(password: str) -> str:
+async def hash_password(password: str) -> str:
     """Hash password with 'bcrypt' algorithm."""
-    return pass_context.hash(password)
+    return await run_hashing(pass_context.hash, password)
 
 
-def verify(plain_password: str, hashed_password: str) -> bool:
+async def verify(plain_password: str, hashed_password: str) -> bool:
     """Verifying password with hashed password."""
-    return pass_context.verify(plain_password, hashed_password)
+    return await run_hashing(pass_context.verify, plain_password, hashed_password)
@@ -18,7 +18,8 @@ auth_router = APIRouter(prefix="/auth", tags=["Auth"])
     responses={
         422: {
             "description": "Username is already taken",
-        }
+        },
+        503: {"description": "Server is busy, try again later."},
     },
 )
 async def create_user_view(user: UserIn, db: AsyncSession = Depends(get_session)):
@@ -29,7 +30,10 @@ async def create_user_view(user: UserIn, db: AsyncSession = Depends(get_session)
 @auth_router.post(
     "/login",
     response_model=Token,
-    responses={403: {"description": "Invalid Credentials"}},
+    responses={
+        403: {"description": "Invalid Credentials"},
+        503: {"description": "Server is busy, try again later."},
+    },
 )
 async def login_view(
     user_credentials: OAuth2PasswordRequestForm = Depends(),
@@ -0,0 +1,169 @@
+import asyncio
+from typing import Any
+
+import asyncpg
+import orjson
+from loguru import logger
+
+from src.cache import cache
+from src.settings import settings
+from src.oauth2.cache import known_users
+from src.api.events.utils import CACHE_CHANNEL, CHANNEL
+
+
+class Subscriber:
+    """
+    Queue of events for one WebSocket connection.
+
+    None in the queue means the connection fell too far behind and must be
+    closed, its client has to reload and subscribe again.
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue: asyncio.Queue[str | None] = asyncio.Queue(queue_size)
+
+    def put(self, payload: str) -> bool:
+        """Queues event, returns False if queue overflowed."""
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+
+class EventHub:
+    """
+    Delivers events published by any worker to this worker's subscribers.
+
+    Events come from Postgres LISTEN on its own connection, which is
+    reopened if lost. Vote count changes of a post are coalesced over
+    'coalesce_seconds', subscribers get only the latest counts.
+
+    The same connection receives keys changed by other workers, which are
+    dropped from known users and from cache if it is kept in process memory.
+    """
+
+    def __init__(self, queue_size: int, coalesce_seconds: float) -> None:
+        self.queue_size = queue_size
+        self.coalesce_seconds = coalesce_seconds
+        self.subscribers: set[Subscriber] = set()
+        self.vote_counts: dict[int, str] = {}
+        self.received = 0
+        self.overflows = 0
+        self.invalidations = 0
+        self.listening = False
+        self.tasks: list[asyncio.Task] = []
+        # Loop keeps only weak references to tasks, running ones are kept here.
+        self.invalidating: set[asyncio.Task] = set()
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self.queue_size)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    def broadcast(self, payload: str) -> None:
+        for subscriber in list(self.subscribers):
+            if not subscriber.put(payload):
+                self.overflows += 1
+                self.subscribers.discard(subscriber)
+
+    def dispatch(self, payload: str) -> None:
+        """Broadcasts event, vote counts are held back if coalescing."""
+        self.received += 1
+        event = orjson.loads(payload)
+        if event["type"] == "votes_changed" and self.coalesce_seconds > 0:
+            self.vote_counts[event["post_id"]] = payload
+            return
+        if event["type"] == "post_deleted":
+            self.vote_counts.pop(event["post_id"], None)
+        self.broadcast(payload)
+
+    def on_notification(self, conn: Any, pid: int, channel: str, payload: str) -> None:
+        self.dispatch(payload)
+
+    def on_invalidation(self, conn: Any, pid: int, channel: str, payload: str) -> None:
+        self.invalidations += 1
+        keys = payload.split(" ")
+        known_users.invalidate(*keys)
+        if not cache.shared:
+            task = asyncio.create_task(cache.invalidate(*keys))
+            self.invalidating.add(task)
+            task.add_done_callback(self.on_invalidated)
+
+    def on_invalidated(self, task: asyncio.Task) -> None:
+        self.invalidating.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.opt(exception=task.exception()).error("Failed to invalidate cache.")
+
+    async def listen(self) -> None:
+        """Keeps connection listening for events, reconnects when it is lost."""
+        while True:
+            lost = asyncio.Event()
+            try:
+                conn = await asyncpg.connect(
+                    host=settings.postgres_host,
+                    port=int(settings.postgres_port),
+                    user=settings.postgres_user,
+                    password=settings.postgres_password,
+                    database=settings.postgres_database_name,
+                )
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning(f"Can't listen for events: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            try:
+                conn.add_termination_listener(lambda _: lost.set())
+                await conn.add_listener(CHANNEL, self.on_notification)
+                await conn.add_listener(CACHE_CHANNEL, self.on_invalidation)
+                # Changes made while not listening were missed.
+                known_users.clear()
+                if not cache.shared:
+                    await cache.clear()
+                self.listening = True
+                await lost.wait()
+                logger.warning("Lost connection listening for events.")
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning(f"Stopped listening for events: {e}")
+            finally:
+                self.listening = False
+                await conn.close()
+            await asyncio.sleep(1)
+
+    async def run_coalesced(self) -> None:
+        while True:
+            await asyncio.sleep(self.coalesce_seconds)
+            vote_counts, self.vote_counts = self.vote_counts, {}
+            for payload in vote_counts.values():
+                self.broadcast(payload)
+
+    async def start(self) -> None:
+        self.tasks.append(asyncio.create_task(self.listen()))
+        if self.coalesce_seconds > 0:
+            self.tasks.append(asyncio.create_task(self.run_coalesced()))
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        await asyncio.gather(*self.invalidating, return_exceptions=True)
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            "listening": self.listening,
+            "subscribers": len(self.subscribers),
+            "received": self.received,
+            "overflows": self.overflows,
+            "invalidations": self.invalidations,
+            "pending_vote_counts": len(self.vote_counts),
+        }
+
+
+event_hub = EventHub(settings.events_queue_size, settings.events_coalesce_seconds)
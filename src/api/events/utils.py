@@ -0,0 +1,132 @@
+from typing import Any, Iterable
+
+import orjson
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    Text,
+    any_,
+    case,
+    func,
+    literal,
+    null,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache import cache
+from src.db_models import Post
+from src.oauth2.cache import KNOWN_USER_PREFIX
+
+
+CHANNEL = "post_events"
+# Keys of changed cache entries, for caches kept in process memory.
+CACHE_CHANNEL = "cache_invalidations"
+
+# NOTIFY payloads must be shorter than this, content of posts whose events
+# would be longer is left out and has to be fetched.
+MAX_PAYLOAD_BYTES = 8000
+
+
+async def notify(channel: str, payloads: list[str], db: AsyncSession) -> None:
+    """
+    Sends payloads to all workers through NOTIFY in one statement.
+
+    They are delivered only when transaction of 'db' commits, so they
+    must be sent before commit.
+    """
+    if not payloads:
+        return
+
+    rows = (
+        func.unnest(literal(payloads, ARRAY(Text)))
+        .table_valued("payload")
+        .render_derived()
+    )
+    await db.execute(select(func.pg_notify(channel, rows.c.payload)))
+
+
+async def publish(events: Iterable[dict[str, Any]], db: AsyncSession) -> None:
+    """Sends events to WebSocket subscribers of all workers, see 'notify'."""
+    await notify(CHANNEL, [orjson.dumps(event).decode() for event in events], db)
+
+
+async def publish_invalidations(keys: Iterable[str], db: AsyncSession) -> None:
+    """
+    Makes all workers drop 'keys' from their caches when transaction of 'db'
+    commits. Shared caches need nothing, as the writer invalidates them,
+    but every worker keeps its own known users.
+
+    Keys are sent space-separated, in as few notifications as fit.
+    """
+    if cache.shared:
+        keys = [key for key in keys if key.startswith(KNOWN_USER_PREFIX)]
+
+    payloads: list[str] = []
+    for key in keys:
+        if payloads and len(payloads[-1]) + 1 + len(key) < MAX_PAYLOAD_BYTES:
+            payloads[-1] += f" {key}"
+        else:
+            payloads.append(key)
+    await notify(CACHE_CHANNEL, payloads, db)
+
+
+def post_event(event_type: str, content: Any) -> ColumnElement:
+    post = func.json_build_object(
+        "id",
+        Post.id,
+        "owner_id",
+        Post.owner_id,
+        "content",
+        content,
+        "like_count",
+        Post.like_count,
+        "dislike_count",
+        Post.dislike_count,
+        "created_at",
+        Post.created_at,
+        "updated_at",
+        Post.updated_at,
+    )
+    return func.json_build_object("type", event_type, "post", post).cast(Text)
+
+
+async def publish_posts(event_type: str, post_ids: list[int], db: AsyncSession) -> None:
+    """
+    Sends 'event_type' events with rows of posts, built by database.
+
+    Size is checked on the encoded event, as escaping can make it several
+    times longer than the content.
+    """
+    event = post_event(event_type, Post.content)
+    payload = case(
+        (func.octet_length(event) < MAX_PAYLOAD_BYTES, event),
+        else_=post_event(event_type, null()),
+    )
+    db_query = select(func.pg_notify(CHANNEL, payload)).where(
+        Post.id == any_(literal(post_ids, ARRAY(Integer)))
+    )
+    await db.execute(db_query)
+
+
+async def publish_post_deleted(post_id: int, db: AsyncSession) -> None:
+    await publish([{"type": "post_deleted", "post_id": post_id}], db)
+
+
+async def publish_vote_counts(
+    counts: Iterable[tuple[int, int, int]], db: AsyncSession
+) -> None:
+    """Sends (post_id, like_count, dislike_count) of posts whose votes changed."""
+    await publish(
+        (
+            {
+                "type": "votes_changed",
+                "post_id": post_id,
+                "like_count": likes,
+                "dislike_count": dislikes,
+            }
+            for post_id, likes, dislikes in counts
+        ),
+        db,
+    )
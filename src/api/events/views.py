@@ -0,0 +1,61 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, WebSocket, status
+
+from src.db.session import async_session
+from src.oauth2.core import get_current_user
+from src.api.events.hub import Subscriber, event_hub
+
+
+events_router = APIRouter(tags=["Events"])
+
+
+async def send_events(websocket: WebSocket, subscriber: Subscriber) -> None:
+    while (payload := await subscriber.queue.get()) is not None:
+        await websocket.send_text(payload)
+    await websocket.close(
+        status.WS_1013_TRY_AGAIN_LATER, "Too many undelivered events, reload."
+    )
+
+
+async def receive_until_disconnect(websocket: WebSocket) -> None:
+    # Clients send nothing, reading only notices disconnect.
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@events_router.websocket("/ws")
+async def events_view(websocket: WebSocket, token: str = ""):
+    """
+    Stream of JSON events about all posts, replacing polling of 'GET /posts'.
+
+    Events are 'post_created' and 'post_updated' with the post ('content' is
+    null if too long to send, fetch the post then), 'post_deleted' with
+    'post_id' and 'votes_changed' with 'post_id', 'like_count' and
+    'dislike_count'. Vote counts of a post come at most once per
+    'events_coalesce_seconds'.
+
+    Access token is taken from 'Authorization' header or 'token' query
+    parameter, as browsers can't set headers of WebSocket requests.
+    Connection is closed with code 1013 if client can't keep up.
+    """
+    scheme, _, header_token = websocket.headers.get("authorization", "").partition(" ")
+    token = header_token if scheme.lower() == "bearer" else token
+    try:
+        async with async_session() as db:
+            await get_current_user(token, db)
+    except HTTPException:
+        await websocket.close(status.WS_1008_POLICY_VIOLATION, "Not authenticated.")
+        return
+
+    await websocket.accept()
+    subscriber = event_hub.subscribe()
+    sender = asyncio.create_task(send_events(websocket, subscriber))
+    receiver = asyncio.create_task(receive_until_disconnect(websocket))
+    try:
+        await asyncio.wait([sender, receiver], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        event_hub.unsubscribe(subscriber)
+        sender.cancel()
+        receiver.cancel()
+        await asyncio.gather(sender, receiver, return_exceptions=True)
@@ -0,0 +1,108 @@
+from itertools import islice
+from typing import Any, Callable, Iterable
+
+from loguru import logger
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache import cache
+from src.settings import settings
+from src.utils_classes import ImportFormat, ImportKind
+from src.api_models import ImportPost, ImportUser, ImportVote
+from src.api.events.utils import publish_invalidations
+from src.api.imports.utils import (
+    RowResult,
+    insert_posts,
+    insert_users,
+    insert_votes,
+    read_records,
+)
+
+
+IMPORTERS = {
+    ImportKind.USERS: (ImportUser, insert_users),
+    ImportKind.POSTS: (ImportPost, insert_posts),
+    ImportKind.VOTES: (ImportVote, insert_votes),
+}
+
+
+def validation_detail(error: ValidationError) -> str:
+    first = error.errors()[0]
+    field = ".".join(str(part) for part in first["loc"])
+    return f"{field}: {first['msg']}." if field else f"{first['msg']}."
+
+
+async def insert_one_by_one(
+    insert_batch: Callable, rows: list[BaseModel], db: AsyncSession
+) -> tuple[list[RowResult], list[str]]:
+    """
+    Inserts rows of a batch which failed one by one, each under a savepoint,
+    so rows rejected by database are reported instead of failing the batch.
+    """
+    results: list[RowResult] = []
+    cache_keys: list[str] = []
+    for row in rows:
+        try:
+            async with db.begin_nested():
+                [result], keys = await insert_batch([row], db)
+        except DBAPIError as e:
+            cause = e.orig.__cause__ or e.orig
+            result, keys = f"Rejected by database: {cause}.", []
+        results.append(result)
+        cache_keys += keys
+    return results, cache_keys
+
+
+async def import_records(
+    kind: ImportKind, lines: Iterable[str], fmt: ImportFormat, db: AsyncSession
+) -> dict[str, Any]:
+    """
+    Imports users, posts or votes from NDJSON or CSV 'lines'.
+
+    Records are inserted in batches of 'import_batch_size', each batch in its
+    own transaction. Invalid records are reported with their line and
+    skipped, the rest is imported. If database rejects a batch, its records
+    are retried one by one.
+    Returns number of imported records, id of every record (None if it was
+    rejected, voted post id for votes) and errors.
+    """
+    model, insert_batch = IMPORTERS[kind]
+    imported = 0
+    ids: list[int | None] = []
+    errors: list[dict[str, Any]] = []
+
+    records = read_records(lines, fmt)
+    while batch := list(islice(records, settings.import_batch_size)):
+        rows: list[BaseModel] = []
+        outcomes: list[tuple[int, str | None]] = []
+        for line, record, error in batch:
+            if record is not None:
+                try:
+                    rows.append(model.model_validate(record))
+                except ValidationError as e:
+                    error = validation_detail(e)
+            outcomes.append((line, error))
+
+        try:
+            results, cache_keys = await insert_batch(rows, db) if rows else ([], [])
+        except DBAPIError:
+            await db.rollback()
+            results, cache_keys = await insert_one_by_one(insert_batch, rows, db)
+        await publish_invalidations(cache_keys, db)
+        await db.commit()
+        await cache.invalidate(*cache_keys)
+
+        # Results are in order of valid records.
+        inserted = iter(results)
+        for line, error in outcomes:
+            result = error or next(inserted)
+            if isinstance(result, str):
+                errors.append({"line": line, "detail": result})
+                ids.append(None)
+            else:
+                imported += 1
+                ids.append(result)
+
+    logger.info(f"Imported {imported} {kind.value}, rejected {len(errors)}.")
+    return {"imported": imported, "ids": ids, "errors": errors}
@@ -0,0 +1,278 @@
+import csv
+from typing import Any, Iterable, Iterator
+
+import orjson
+from sqlalchemy import (
+    Integer,
+    String,
+    any_,
+    cast,
+    column,
+    func,
+    literal,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TIMESTAMP, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db_models import Post, User, Vote
+from src.utils_classes import ImportFormat, VoteType
+from src.api_models import ImportPost, ImportUser, ImportVote
+from src.api.auth.utils import pass_context
+from src.api.posts.utils import post_cache_key, vote_cache_key
+from src.api.users.utils import fan_out_posts
+
+
+# Id of imported row or reason it was rejected.
+RowResult = int | str
+
+
+def read_records(
+    lines: Iterable[str], fmt: ImportFormat
+) -> Iterator[tuple[int, dict[str, Any] | None, str | None]]:
+    """
+    Yields (line, record, error) for every record in NDJSON or CSV 'lines',
+    'record' is None if it can't be parsed. CSV must start with a header.
+    """
+    if fmt == ImportFormat.CSV:
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Empty cells are missing values, so optional fields get defaults.
+            record = {key: value for key, value in row.items() if value != ""}
+            if None in record:
+                yield reader.line_num, None, "More values than columns."
+            else:
+                yield reader.line_num, record, None
+        return
+
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield number, None, f"Invalid JSON: {e}."
+            continue
+        if isinstance(record, dict):
+            yield number, record, None
+        else:
+            yield number, None, "Line is not a JSON object."
+
+
+def unnest(*arrays: tuple[str, Any, list]):
+    """Rows made of (name, type, values) arrays, all sent as one parameter each."""
+    return (
+        func.unnest(*(literal(data, ARRAY(type_)) for _, type_, data in arrays))
+        .table_valued(*(column(name, type_) for name, type_, _ in arrays))
+        .render_derived()
+    )
+
+
+async def resolve_usernames(usernames: Iterable[str], db: AsyncSession) -> dict:
+    """Returns ids of existing users by their usernames."""
+    db_query = select(User.username, User.id).where(
+        User.username == any_(literal(list(set(usernames)), ARRAY(String)))
+    )
+    res = await db.execute(db_query)
+    return dict(res.tuples().all())
+
+
+async def insert_users(
+    users: list[ImportUser], db: AsyncSession
+) -> tuple[list[RowResult], list[str]]:
+    """
+    Inserts users with already hashed passwords. Taken usernames are rejected.
+
+    Returns result of every user and cache keys to invalidate (none).
+    """
+    hashed = [
+        pass_context.identify(user.password_hash, required=False) is not None
+        for user in users
+    ]
+    rows: dict[str, ImportUser] = {}
+    for user, is_hashed in zip(users, hashed):
+        if is_hashed:
+            rows.setdefault(user.username, user)
+
+    ids = {}
+    if rows:
+        new = unnest(
+            ("username", String, list(rows)),
+            ("password", String, [user.password_hash for user in rows.values()]),
+            (
+                "created_at",
+                TIMESTAMP(timezone=True),
+                [user.created_at for user in rows.values()],
+            ),
+        )
+        db_query = (
+            insert(User)
+            .from_select(
+                ["username", "password", "created_at"],
+                select(
+                    new.c.username,
+                    new.c.password,
+                    func.coalesce(new.c.created_at, func.now()),
+                ),
+            )
+            .on_conflict_do_nothing(index_elements=[User.username])
+            .returning(User.username, User.id)
+        )
+        res = await db.execute(db_query)
+        ids = dict(res.tuples().all())
+
+    results: list[RowResult] = []
+    for user, is_hashed in zip(users, hashed):
+        if not is_hashed:
+            results.append("Unsupported password hash, bcrypt is expected.")
+        elif rows[user.username] is user and user.username in ids:
+            results.append(ids[user.username])
+        else:
+            results.append("Username is already taken")
+    return results, []
+
+
+async def insert_posts(
+    posts: list[ImportPost], db: AsyncSession
+) -> tuple[list[RowResult], list[str]]:
+    """
+    Inserts posts of existing users, delivers them to timelines and updates
+    authors' post counters.
+
+    Returns result of every post and cache keys to invalidate (none).
+    """
+    owners = await resolve_usernames((post.username for post in posts), db)
+    valid = [post for post in posts if post.username in owners]
+
+    post_ids = []
+    if valid:
+        # Ids are taken upfront, so every post gets its id in input order.
+        res = await db.execute(
+            select(func.nextval("posts_id_seq")).select_from(
+                func.generate_series(1, len(valid))
+            )
+        )
+        post_ids = list(res.scalars())
+        new = unnest(
+            ("id", Integer, post_ids),
+            ("content", String, [post.content for post in valid]),
+            ("owner_id", Integer, [owners[post.username] for post in valid]),
+            (
+                "created_at",
+                TIMESTAMP(timezone=True),
+                [post.created_at for post in valid],
+            ),
+        )
+        created_at = func.coalesce(new.c.created_at, func.now())
+        db_query = insert(Post).from_select(
+            ["id", "content", "owner_id", "created_at", "updated_at"],
+            select(new.c.id, new.c.content, new.c.owner_id, created_at, created_at),
+        )
+        await db.execute(db_query)
+        await fan_out_posts(post_ids, db)
+
+        counts: dict[int, int] = {}
+        for post in valid:
+            counts[owners[post.username]] = counts.get(owners[post.username], 0) + 1
+        changes = values(
+            column("user_id", Integer), column("posts", Integer), name="changes"
+        ).data(list(counts.items()))
+        db_query = (
+            update(User)
+            .where(User.id == changes.c.user_id)
+            .values(post_count=User.post_count + changes.c.posts)
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(db_query)
+
+    new_ids = iter(post_ids)
+    results: list[RowResult] = [
+        next(new_ids) if post.username in owners else "No such user." for post in posts
+    ]
+    return results, []
+
+
+async def insert_votes(
+    votes: list[ImportVote], db: AsyncSession
+) -> tuple[list[RowResult], list[str]]:
+    """
+    Stores votes, replacing existing votes of the same users for the same
+    posts, and recounts counters of voted posts.
+
+    Voted posts are locked in id order, like in 'apply_votes'.
+    Returns voted post id or error for every vote and cache keys to
+    invalidate.
+    """
+    voters = await resolve_usernames((vote.username for vote in votes), db)
+    post_ids = sorted({vote.post_id for vote in votes})
+    db_query = (
+        select(Post.id, Post.owner_id)
+        .where(Post.id == any_(literal(post_ids, ARRAY(Integer))))
+        .order_by(Post.id)
+        .with_for_update(key_share=True)
+    )
+    res = await db.execute(db_query)
+    owners = dict(res.tuples().all())
+
+    results: list[RowResult] = []
+    final: dict[tuple[int, int], VoteType] = {}
+    for vote in votes:
+        user_id = voters.get(vote.username)
+        if user_id is None:
+            results.append("No such user.")
+        elif vote.post_id not in owners:
+            results.append("No such post.")
+        elif owners[vote.post_id] == user_id:
+            results.append("It's your post.")
+        else:
+            final[vote.post_id, user_id] = vote.vote_type
+            results.append(vote.post_id)
+
+    if not final:
+        return results, []
+
+    new = unnest(
+        ("post_id", Integer, [post_id for post_id, _ in final]),
+        ("user_id", Integer, [user_id for _, user_id in final]),
+        ("vote_type", String, [vote_type.name for vote_type in final.values()]),
+    )
+    db_query = insert(Vote).from_select(
+        ["post_id", "user_id", "vote_type"],
+        select(
+            new.c.post_id, new.c.user_id, cast(new.c.vote_type, Vote.vote_type.type)
+        ),
+    )
+    db_query = db_query.on_conflict_do_update(
+        index_elements=[Vote.post_id, Vote.user_id],
+        set_={"vote_type": db_query.excluded.vote_type},
+    )
+    await db.execute(db_query)
+
+    voted = list({post_id for post_id, _ in final})
+    counts = (
+        select(
+            Vote.post_id,
+            func.count().filter(Vote.vote_type == VoteType.LIKE).label("likes"),
+            func.count().filter(Vote.vote_type == VoteType.DISLIKE).label("dislikes"),
+        )
+        .where(Vote.post_id == any_(literal(voted, ARRAY(Integer))))
+        .group_by(Vote.post_id)
+        .subquery()
+    )
+    db_query = (
+        update(Post)
+        .where(Post.id == counts.c.post_id)
+        .values(
+            like_count=counts.c.likes,
+            dislike_count=counts.c.dislikes,
+            last_voted_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(db_query)
+
+    cache_keys = [post_cache_key(post_id) for post_id in voted]
+    cache_keys += [vote_cache_key(post_id, user_id) for post_id, user_id in final]
+    return results, cache_keys
@@ -0,0 +1,60 @@
+import io
+from secrets import compare_digest
+from tempfile import SpooledTemporaryFile
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api_models import ImportResult
+from src.db.session import get_session
+from src.settings import settings
+from src.utils_classes import ImportFormat, ImportKind
+from src.api.imports.core import import_records
+
+
+imports_router = APIRouter(prefix="/import", tags=["Import"])
+
+# Bodies up to this size are kept in memory, bigger ones go to disk.
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+
+def check_import_token(x_import_token: str = Header("")) -> None:
+    """Lets in requests with 'import_token', no one if it is not set."""
+    # Strings must be ASCII, headers may have any Latin-1 characters.
+    if not settings.import_token or not compare_digest(
+        x_import_token.encode(), settings.import_token.encode()
+    ):
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Invalid import token.")
+
+
+@imports_router.post(
+    "/{kind}",
+    response_model=ImportResult,
+    dependencies=[Depends(check_import_token)],
+    responses={403: {"description": "Invalid import token."}},
+)
+async def import_view(
+    kind: ImportKind,
+    request: Request,
+    format: ImportFormat = ImportFormat.NDJSON,
+    db: AsyncSession = Depends(get_session),
+):
+    """
+    Import users, posts or votes from NDJSON or CSV request body.
+
+    Records are users' 'username', 'password_hash' (bcrypt) and optional
+    'created_at'; posts' author 'username', 'content' and optional
+    'created_at'; votes' voter 'username', 'post_id' and 'vote_type'.
+    CSV starts with a header naming these columns.
+
+    Invalid records are reported in 'errors' with their line, the rest is
+    imported. 'ids' has id of every record in input order, null if it was
+    rejected, for votes it is id of voted post.
+    Requires 'X-Import-Token' header.
+    """
+    with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        lines = io.TextIOWrapper(body, encoding="utf-8", newline="")
+        return await import_records(kind, lines, format, db)
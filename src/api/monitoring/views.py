@@ -0,0 +1,59 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.api.events.hub import event_hub
+from src.api.posts.buffer import vote_buffer
+from src.cache import cache
+from src.db.replicas import replica_router
+from src.db.session import get_pool_stats
+from src.metrics import render
+
+
+monitoring_router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
+metrics_router = APIRouter(tags=["Monitoring"])
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_view():
+    """Request, database and password hashing metrics in Prometheus format."""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+
+@monitoring_router.get("/db-pool")
+async def db_pool_view():
+    """
+    Database connection pool state.
+
+    'overflow' is number of connections opened above 'size', 'waits' and
+    'wait_seconds' are totals of waiting for a connection since start,
+    'timeouts' is number of waits which ended with 503.
+    """
+    return get_pool_stats()
+
+
+@monitoring_router.get("/db-replicas")
+async def db_replicas_view():
+    """Health, replication lag and pool state of every read replica."""
+    return [replica.stats() for replica in replica_router.replicas]
+
+
+@monitoring_router.get("/cache")
+async def cache_view():
+    """Hits, misses and evictions of posts cache since start."""
+    return cache.stats()
+
+
+@monitoring_router.get("/vote-buffer")
+async def vote_buffer_view():
+    """Votes waiting for flush, and totals of flushed and dropped votes."""
+    return vote_buffer.stats()
+
+
+@monitoring_router.get("/events")
+async def events_view():
+    """
+    Whether this worker listens for events, its WebSocket subscribers, events
+    received since start, subscribers dropped for falling behind, cache
+    invalidations received from other workers and vote counts being coalesced.
+    """
+    return event_hub.stats()
@@ -0,0 +1,94 @@
+import asyncio
+from contextlib import suppress
+
+from loguru import logger
+
+from src.cache import cache
+from src.db.session import async_session
+from src.settings import settings
+from src.utils_classes import VoteType
+from src.api.events.utils import publish_invalidations
+from src.api.posts.utils import apply_votes, post_cache_key, vote_cache_key
+
+
+class VoteBuffer:
+    """
+    In-process buffer of votes, applied to DB every 'flush_seconds'.
+
+    Votes of a user for a post made between flushes are folded into one
+    row write, so rapid toggles cost nothing. Votes are not visible until
+    flushed and are lost if the process dies or DB fails during a flush.
+    Disabled when 'flush_seconds' is zero.
+    """
+
+    def __init__(self, flush_seconds: float) -> None:
+        self.flush_seconds = flush_seconds
+        self.votes: list[tuple[int, int, VoteType]] = []
+        self.flushed = 0
+        self.dropped = 0
+        self.flushes: asyncio.Task | None = None
+        self.flushing: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.flush_seconds > 0
+
+    def add(self, user_id: int, post_id: int, vote_type: VoteType) -> None:
+        self.votes.append((user_id, post_id, vote_type))
+
+    async def flush(self) -> None:
+        """Applies buffered votes in one transaction."""
+        votes, self.votes = self.votes, []
+        if not votes:
+            return
+
+        try:
+            async with async_session() as db:
+                final = await apply_votes(votes, db, strict=False)
+                cache_keys = [
+                    *(post_cache_key(post_id) for post_id, _ in final),
+                    *(vote_cache_key(post_id, user_id) for post_id, user_id in final),
+                ]
+                await publish_invalidations(cache_keys, db)
+                await db.commit()
+        except Exception:
+            self.dropped += len(votes)
+            logger.exception(f"Dropped {len(votes)} buffered votes.")
+            return
+
+        self.flushed += len(votes)
+        await cache.invalidate(*cache_keys)
+
+    async def run_flushes(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            # Stopping must not cancel a flush halfway, its votes would be lost.
+            self.flushing = asyncio.create_task(self.flush())
+            await asyncio.shield(self.flushing)
+
+    async def start(self) -> None:
+        if self.enabled:
+            self.flushes = asyncio.create_task(self.run_flushes())
+
+    async def stop(self) -> None:
+        """
+        Stops flushing in background, waits for a flush in progress and
+        flushes what is left.
+        """
+        if self.flushes:
+            self.flushes.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.flushes
+        if self.flushing:
+            await self.flushing
+        await self.flush()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": len(self.votes),
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+        }
+
+
+vote_buffer = VoteBuffer(settings.vote_buffer_flush_seconds)
@@ -1,58 +1,217 @@
 from datetime import datetime
+from typing import Any, AsyncIterator
+
+import orjson
 
 from fastapi import HTTPException, status
-from sqlalchemy import desc, select
+from sqlalchemy import desc, func, literal_column, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db_models import Post, Vote
-from src.utils_classes import VoteType
-from src.api_models import PostIn
-from src.api.posts.utils import get_post_from_db, update_post_for_user
+from src.cache import cache
+from src.db.session import release_connection
+from src.db_models import Post
+from src.settings import settings
+from src.utils_classes import SearchMode, VoteType
+from src.api_models import PostIn, VoteIn
+from src.api.events.utils import (
+    publish_invalidations,
+    publish_post_deleted,
+    publish_posts,
+    publish_vote_counts,
+)
+from src.api.posts.buffer import vote_buffer
+from src.api.posts.utils import (
+    PostRow,
+    apply_votes,
+    cast_vote,
+    decode_cursor,
+    decode_score_cursor,
+    encode_cursor,
+    encode_score_cursor,
+    get_post_from_db,
+    get_cached_post_for_user,
+    get_post_row,
+    post_cache_key,
+    select_posts_changed_since,
+    select_posts_for_user,
+    update_post_for_user,
+    vote_cache_key,
+)
+from src.api.users.utils import change_post_count, fan_out_posts, user_exists
+
+
+SEARCH_CONFIG = literal_column("'english'::regconfig")
 
 
 async def create_post(user_id: int, post_in: PostIn, db: AsyncSession) -> Post:
     """Creates user's post in 'db'."""
     new_post = Post(content=post_in.content, owner_id=user_id)
     db.add(new_post)
+    await db.flush()
+    await fan_out_posts([new_post.id], db)
+    await change_post_count(user_id, 1, db)
+    await publish_posts("post_created", [new_post.id], db)
+    cache_keys = [post_cache_key(new_post.id)]
+    await publish_invalidations(cache_keys, db)
     await db.commit()
     await db.refresh(new_post)
+    await cache.invalidate(*cache_keys)
 
     await update_post_for_user(user_id, new_post, db)
     return new_post
 
 
 async def get_all_posts(
-    query: str | None, offset: int, limit: int, user_id: int, db: AsyncSession
-) -> list[Post]:
+    query: str | None,
+    search: SearchMode,
+    cursor: str | None,
+    offset: int,
+    limit: int,
+    user_id: int,
+    db: AsyncSession,
+) -> tuple[list[PostRow], str | None]:
+    """
+    Retrieves posts filtered by 'query' from 'db' as plain rows.
+
+    In 'substring' mode posts containing 'query' are returned newest first,
+    page starts right after the post encoded in 'cursor' (and then skips
+    'offset' posts). Returns posts and cursor of the next page, which is None
+    on the last page.
+
+    In 'fulltext' mode posts matching 'query' as web search are returned
+    ranked by relevance, paginated by 'offset' only.
+    """
+    db_query = select_posts_for_user(user_id).limit(limit + 1).offset(offset)
+    ranked = bool(query) and search == SearchMode.FULLTEXT
+
+    if ranked:
+        if cursor:
+            raise HTTPException(
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+                "Cursor is not supported by full-text search, use offset.",
+            )
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        db_query = db_query.filter(Post.content_tsv.bool_op("@@")(ts_query)).order_by(
+            desc(func.ts_rank(Post.content_tsv, ts_query))
+        )
+    elif query:
+        db_query = db_query.filter(Post.content.contains(query))
+
+    db_query = db_query.order_by(desc(Post.created_at), desc(Post.id))
+    if cursor:
+        db_query = db_query.filter(
+            tuple_(Post.created_at, Post.id) < decode_cursor(cursor)
+        )
+    res = await db.execute(db_query)
+    posts = [dict(row) for row in res.mappings()]
+    await release_connection(db)
+
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        if not ranked:
+            next_cursor = encode_cursor(posts[-1]["created_at"], posts[-1]["id"])
+
+    return posts, next_cursor
+
+
+async def get_user_posts(
+    owner_id: int, cursor: str | None, limit: int, user_id: int, db: AsyncSession
+) -> tuple[list[PostRow], str | None]:
+    """
+    Retrieves posts of user 'owner_id' from 'db' as plain rows, newest first.
+
+    Page starts right after the post encoded in 'cursor'. Returns posts and
+    cursor of the next page, which is None on the last page.
+    """
+    db_query = (
+        select_posts_for_user(user_id)
+        .filter(Post.owner_id == owner_id)
+        .order_by(desc(Post.created_at), desc(Post.id))
+        .limit(limit + 1)
+    )
+    if cursor:
+        db_query = db_query.filter(
+            tuple_(Post.created_at, Post.id) < decode_cursor(cursor)
+        )
+    res = await db.execute(db_query)
+    posts = [dict(row) for row in res.mappings()]
+
+    if not posts and not cursor and not await user_exists(owner_id, db):
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "No such user.")
+    await release_connection(db)
+
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1]["created_at"], posts[-1]["id"])
+
+    return posts, next_cursor
+
+
+async def get_trending_posts(
+    cursor: str | None, limit: int, user_id: int, db: AsyncSession
+) -> tuple[list[PostRow], str | None]:
     """
-    Retrieves all posts from db filtered by 'query', offsetted and limited from 'db'.
+    Retrieves posts from 'db' as plain rows, hottest first.
+
+    Posts are ordered by stored 'hot_score', which grows with net votes and
+    creation time, so it is a read of the score index. Page starts right
+    after the post encoded in 'cursor'. Returns posts and cursor of the
+    next page, which is None on the last page.
     """
     db_query = (
-        select(Post)
-        .filter(Post.content.contains(query))
-        .order_by(desc(Post.created_at))
-        .limit(limit)
-        .offset(offset)
+        select_posts_for_user(user_id)
+        .add_columns(Post.hot_score)
+        .order_by(desc(Post.hot_score), desc(Post.id))
+        .limit(limit + 1)
     )
+    if cursor:
+        db_query = db_query.filter(
+            tuple_(Post.hot_score, Post.id) < decode_score_cursor(cursor)
+        )
     res = await db.execute(db_query)
-    posts = res.scalars().all()
+    posts = [dict(row) for row in res.mappings()]
+    await release_connection(db)
 
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_score_cursor(posts[-1]["hot_score"], posts[-1]["id"])
     for post in posts:
-        await update_post_for_user(user_id, post, db)
+        del post["hot_score"]
 
-    return posts
+    return posts, next_cursor
 
 
-async def get_single_post(user_id: int, post_id: int, db: AsyncSession) -> Post:
-    """Retrieves one post by 'post_id' from 'db'."""
-    post = await get_post_from_db(post_id, db)
+async def get_single_post(user_id: int, post_id: int, db: AsyncSession) -> PostRow:
+    """Retrieves one post by 'post_id' from 'db' as plain row."""
+    post = await get_cached_post_for_user(user_id, post_id, db)
+    await release_connection(db)
     if not post:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "No such post.")
 
-    await update_post_for_user(user_id, post, db)
     return post
 
 
+async def export_posts(
+    since: datetime | None, db: AsyncSession
+) -> AsyncIterator[bytes]:
+    """
+    Yields posts changed since 'since' as NDJSON, a chunk per
+    'export_batch_size' posts.
+
+    Rows are read through a server-side cursor, so memory use does not
+    depend on number of posts.
+    """
+    db_query = select_posts_changed_since(since).execution_options(
+        yield_per=settings.export_batch_size
+    )
+    res = await db.stream(db_query)
+    async for rows in res.mappings().partitions():
+        yield b"".join(orjson.dumps(dict(row)) + b"\n" for row in rows)
+
+
 async def delete_post(post_id: int, user_id: int, db: AsyncSession) -> None:
     """Deletes post by 'post_id' and 'user_id' from 'db'."""
     post = await get_post_from_db(post_id, db)
@@ -63,7 +222,12 @@ async def delete_post(post_id: int, user_id: int, db: AsyncSession) -> None:
         raise HTTPException(status.HTTP_403_FORBIDDEN, "It's not your post.")
 
     await db.delete(post)
+    await change_post_count(user_id, -1, db)
+    await publish_post_deleted(post_id, db)
+    cache_keys = [post_cache_key(post_id)]
+    await publish_invalidations(cache_keys, db)
     await db.commit()
+    await cache.invalidate(*cache_keys)
 
 
 async def update_post(
@@ -79,8 +243,12 @@ async def update_post(
 
     post.content = new_post.content
     post.updated_at = datetime.utcnow().astimezone()
+    await publish_posts("post_updated", [post_id], db)
+    cache_keys = [post_cache_key(post_id)]
+    await publish_invalidations(cache_keys, db)
 
     await db.commit()
+    await cache.invalidate(*cache_keys)
 
     await update_post_for_user(user_id, post, db)
     return post
@@ -92,29 +260,56 @@ async def vote_post(vote_type: VoteType, user_id: int, post_id: int, db: AsyncSe
 
     If opposite vote exists then updates vote.
     If same vote exists then discards.
+    With vote buffer enabled vote is only queued, post is checked via cache.
     """
-    post = await get_post_from_db(post_id, db)
+    if vote_buffer.enabled:
+        post = await cache.get_or_load(
+            post_cache_key(post_id), lambda: get_post_row(post_id, db)
+        )
+        await release_connection(db)
+        if not post:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, "No such post.")
+        if post["owner_id"] == user_id:
+            raise HTTPException(status.HTTP_403_FORBIDDEN, "It's your post.")
+        vote_buffer.add(user_id, post_id, vote_type)
+        return
 
-    if not post:
+    vote_status, _, likes, dislikes = await cast_vote(user_id, post_id, vote_type, db)
+    if vote_status == "missing":
         raise HTTPException(status.HTTP_404_NOT_FOUND, "No such post.")
-    if post.owner_id == user_id:
+    if vote_status == "own":
         raise HTTPException(status.HTTP_403_FORBIDDEN, "It's your post.")
+    await publish_vote_counts([(post_id, likes, dislikes)], db)
+    cache_keys = [post_cache_key(post_id), vote_cache_key(post_id, user_id)]
+    await publish_invalidations(cache_keys, db)
 
-    query = select(Vote).where(Vote.post_id == post_id, Vote.user_id == user_id)
-    res = await db.execute(query)
-    vote_old: Vote = res.scalars().first()
+    await db.commit()
+    await cache.invalidate(*cache_keys)
 
-    if vote_old:
 
-        if vote_old.vote_type != vote_type:
-            vote_old.vote_type = vote_type
-            await db.commit()
-            return
+async def vote_posts(
+    votes: list[VoteIn], user_id: int, db: AsyncSession
+) -> list[dict[str, Any]]:
+    """
+    Leaves votes for many posts in 'db' in one transaction.
 
-        await db.delete(vote_old)
-        await db.commit()
-        return
+    Votes are applied in order with the same rules as 'vote_post'.
+    If any vote is invalid nothing is applied.
+    Returns final user's vote for every voted post.
+    """
+    if len(votes) > settings.vote_batch_max_size:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Too many votes.")
 
-    vote_new = Vote(post_id=post_id, user_id=user_id, vote_type=vote_type)
-    db.add(vote_new)
+    final = await apply_votes(
+        [(user_id, vote.post_id, vote.vote_type) for vote in votes], db
+    )
+    cache_keys = [
+        *(post_cache_key(post_id) for post_id, _ in final),
+        *(vote_cache_key(post_id, user_id) for post_id, _ in final),
+    ]
+    await publish_invalidations(cache_keys, db)
     await db.commit()
+    await cache.invalidate(*cache_keys)
+    return [
+        {"post_id": post_id, "voted": voted} for (post_id, _), voted in final.items()
+    ]
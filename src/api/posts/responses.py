@@ -0,0 +1,106 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from hashlib import blake2b
+from typing import Any
+
+from fastapi import Request, Response, status
+from fastapi.responses import ORJSONResponse
+
+from src.api.posts.utils import PostRow
+
+
+def as_datetime(value: datetime | str) -> datetime:
+    # Rows cached in Redis come back with datetimes as strings.
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def pop_version(post: PostRow) -> tuple[tuple, datetime]:
+    """
+    Removes 'last_voted_at' from post row, returns what identifies the
+    row's representation and when it last changed.
+
+    Content changes bump 'updated_at', votes change counters and 'voted'.
+    """
+    last_voted_at = post.pop("last_voted_at", None)
+    modified_at = as_datetime(post["updated_at"])
+    if last_voted_at:
+        modified_at = max(modified_at, as_datetime(last_voted_at))
+
+    version = (
+        post["id"],
+        str(post["updated_at"]),
+        post["like_count"],
+        post["dislike_count"],
+        post["voted"],
+    )
+    return version, modified_at
+
+
+def not_modified(request: Request, etag: str, modified_at: datetime | None) -> bool:
+    """
+    Checks request's 'If-None-Match' or, if it is absent, 'If-Modified-Since'.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and modified_at is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # Dates with '-0000' or without zone are parsed as naive, they are UTC.
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return modified_at.replace(microsecond=0) <= since
+    return False
+
+
+def conditional_response(
+    request: Request,
+    content: Any,
+    versions: list[tuple],
+    modified_at: datetime | None,
+    headers: dict[str, str],
+) -> Response:
+    """
+    Responds with 'content' or with 304 if client's copy is up to date.
+
+    Body is serialized only when it is sent. Responses carry user's votes,
+    so they may be cached by the client only and must be revalidated.
+    """
+    headers = {
+        **headers,
+        "ETag": f'"{blake2b(repr(versions).encode(), digest_size=16).hexdigest()}"',
+        "Cache-Control": "private, no-cache",
+    }
+    if modified_at:
+        headers["Last-Modified"] = format_datetime(
+            modified_at.astimezone(timezone.utc), usegmt=True
+        )
+
+    if not_modified(request, headers["ETag"], modified_at):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return ORJSONResponse(content, headers=headers)
+
+
+def post_response(request: Request, post: PostRow) -> Response:
+    version, modified_at = pop_version(post)
+    return conditional_response(request, post, [version], modified_at, {})
+
+
+def post_list_response(
+    request: Request, posts: list[PostRow], next_cursor: str | None
+) -> Response:
+    """
+    Responds with page of posts, cursor of the next page is in 'X-Next-Cursor'
+    header, which is absent on the last page.
+
+    Page has no 'Last-Modified', as it changes when a post is deleted too.
+    """
+    versions = [pop_version(post)[0] for post in posts]
+    versions.append((next_cursor,))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return conditional_response(request, posts, versions, None, headers)
@@ -1,47 +1,413 @@
-from sqlalchemy import func, select
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import (
+    Integer,
+    Select,
+    String,
+    and_,
+    case,
+    column,
+    delete,
+    func,
+    literal,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.cache import cache
+from src.db.session import async_session
 from src.db_models import Post, Vote
+from src.api.events.utils import publish_vote_counts
+from src.settings import settings
 from src.utils_classes import VoteType
 
 
+PostRow = dict[str, Any]
+
+
 async def get_post_from_db(post_id: int, db: AsyncSession) -> Post:
     db_query = select(Post).where(Post.id == post_id)
     res = await db.execute(db_query)
     return res.scalars().first()
 
 
-async def get_vote_count_from_db(
-    vote_type: VoteType, post: Post, db: AsyncSession
-) -> int:
-    query_likes = select(func.count(Vote.user_id)).where(
-        Vote.post_id == post.id, Vote.vote_type == vote_type
+POST_COLUMNS = (
+    Post.id,
+    Post.content,
+    Post.owner_id,
+    Post.like_count,
+    Post.dislike_count,
+    Post.created_at,
+    Post.updated_at,
+    Post.last_voted_at,
+)
+
+
+def select_posts_for_user(user_id: int) -> Select:
+    """
+    Selects posts as plain rows shaped like 'PostOutForUser'.
+
+    User's vote is joined in, so rows need no further hydration and no ORM
+    objects are built for them.
+    """
+    return select(*POST_COLUMNS, Vote.vote_type.label("voted")).outerjoin(
+        Vote, and_(Vote.post_id == Post.id, Vote.user_id == user_id)
     )
-    res = await db.execute(query_likes)
-    return res.scalars().first()
 
 
-async def update_votes(post: Post, db: AsyncSession) -> None:
-    post.like_count = await get_vote_count_from_db(VoteType.LIKE, post, db)
-    post.dislike_count = await get_vote_count_from_db(VoteType.DISLIKE, post, db)
+def select_posts_changed_since(since: datetime | None) -> Select:
+    """
+    Selects posts edited or voted for at 'since' or later, all if it is None,
+    ordered by id.
+    """
+    db_query = select(*POST_COLUMNS).order_by(Post.id)
+    if since is not None:
+        db_query = db_query.where(
+            or_(Post.updated_at >= since, Post.last_voted_at >= since)
+        )
+    return db_query
+
+
+def post_cache_key(post_id: int) -> str:
+    return f"post:{post_id}"
+
 
+def vote_cache_key(post_id: int, user_id: int) -> str:
+    return f"vote:{post_id}:{user_id}"
 
-async def get_user_vote_from_db(
-    user_id: int, post: Post, db: AsyncSession
+
+async def get_post_row(post_id: int, db: AsyncSession) -> PostRow | None:
+    db_query = select(*POST_COLUMNS).where(Post.id == post_id)
+    res = await db.execute(db_query)
+    row = res.mappings().first()
+    return dict(row) if row else None
+
+
+async def get_user_vote(
+    user_id: int, post_id: int, db: AsyncSession
 ) -> VoteType | None:
-    db_query = select(Vote).where(Vote.post_id == post.id, Vote.user_id == user_id)
+    db_query = select(Vote.vote_type).where(
+        Vote.post_id == post_id, Vote.user_id == user_id
+    )
     res = await db.execute(db_query)
-    vote: Vote = res.scalars().first()
-    if vote:
-        return vote.vote_type
-    return None
+    return res.scalar()
 
 
-async def update_voted_by_user(user_id: int, post: Post, db: AsyncSession) -> None:
-    vote_type = await get_user_vote_from_db(user_id, post, db)
-    post.voted = vote_type
+async def get_cached_post_for_user(
+    user_id: int, post_id: int, db: AsyncSession
+) -> PostRow | None:
+    """
+    Retrieves post and user's vote for it through cache.
+
+    Post row (with vote counts) is shared by all users, vote is cached per user.
+    Post row is loaded from primary, as a lagging replica would put the old
+    row back right after it was invalidated, for everyone.
+    """
+
+    async def load_post() -> PostRow | None:
+        if "replica" not in db.info or settings.cache_backend == "none":
+            return await get_post_row(post_id, db)
+        async with async_session() as primary:
+            return await get_post_row(post_id, primary)
+
+    post = await cache.get_or_load(post_cache_key(post_id), load_post)
+    if post is None:
+        return None
+
+    voted = await cache.get_or_load(
+        vote_cache_key(post_id, user_id), lambda: get_user_vote(user_id, post_id, db)
+    )
+    return {**post, "voted": voted}
+
+
+# Ids are 'integer' columns, bigger ones in cursors can't be compared with them.
+POST_IDS = range(-(2**31), 2**31)
+
+
+def encode_cursor(created_at: datetime, post_id: int) -> str:
+    """Packs position of the post in feed into opaque string."""
+    raw = f"{created_at.isoformat()}|{post_id}".encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Unpacks (created_at, post_id) from string made by 'encode_cursor'."""
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, post_id = raw.split("|")
+        position = datetime.fromisoformat(created_at), int(post_id)
+    except ValueError:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Invalid cursor.")
+    if position[1] not in POST_IDS:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Invalid cursor.")
+    return position
+
+
+def encode_score_cursor(score: float, post_id: int) -> str:
+    """Packs position of the post in trending posts into opaque string."""
+    raw = f"{score!r}|{post_id}".encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_score_cursor(cursor: str) -> tuple[float, int]:
+    """Unpacks (score, post_id) from string made by 'encode_score_cursor'."""
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        score, post_id = raw.split("|")
+        position = float(score), int(post_id)
+    except ValueError:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Invalid cursor.")
+    if position[1] not in POST_IDS:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Invalid cursor.")
+    return position
+
+
+async def update_posts_for_user(
+    user_id: int, posts: Sequence[Post], db: AsyncSession
+) -> None:
+    """
+    Sets 'voted' on every post from 'posts'.
+
+    Vote counts are stored on the posts themselves, so only the user's
+    votes for the whole page are fetched, in one query.
+    """
+    if not posts:
+        return
+
+    db_query = select(Vote.post_id, Vote.vote_type).where(
+        Vote.user_id == user_id, Vote.post_id.in_([post.id for post in posts])
+    )
+    res = await db.execute(db_query)
+    votes = dict(res.tuples().all())
+
+    for post in posts:
+        post.voted = votes.get(post.id)
 
 
 async def update_post_for_user(user_id: int, post: Post, db: AsyncSession) -> None:
-    await update_votes(post, db)
-    await update_voted_by_user(user_id, post, db)
+    await update_posts_for_user(user_id, [post], db)
+
+
+def vote_count_deltas(old: VoteType | None, new: VoteType | None) -> tuple[int, int]:
+    """Returns (like_count, dislike_count) changes for vote going 'old' -> 'new'."""
+    likes = (new == VoteType.LIKE) - (old == VoteType.LIKE)
+    dislikes = (new == VoteType.DISLIKE) - (old == VoteType.DISLIKE)
+    return likes, dislikes
+
+
+async def cast_vote(
+    user_id: int, post_id: int, vote_type: VoteType, db: AsyncSession
+) -> tuple[str, VoteType | None, int | None, int | None]:
+    """
+    Toggles user's vote for post in one round trip, see 'toggle_vote' function.
+
+    Returns (status, voted, like_count, dislike_count), where status is 'ok',
+    'missing' for missing post or 'own' for user's own post. Post row stays
+    locked until commit.
+    """
+    result = func.toggle_vote(
+        post_id, user_id, literal(vote_type, Vote.vote_type.type)
+    ).table_valued(
+        column("status", String),
+        column("voted", Vote.vote_type.type),
+        column("likes", Integer),
+        column("dislikes", Integer),
+    )
+    res = await db.execute(select(result))
+    return res.tuples().one()
+
+
+def toggle_vote(old: VoteType | None, vote_type: VoteType) -> VoteType | None:
+    """Returns user's vote after voting 'vote_type', same vote discards itself."""
+    return None if old == vote_type else vote_type
+
+
+async def apply_votes(
+    votes: Sequence[tuple[int, int, VoteType]], db: AsyncSession, strict: bool = True
+) -> dict[tuple[int, int], VoteType | None]:
+    """
+    Applies (user_id, post_id, vote_type) votes in order, like 'vote_post' would.
+
+    Votes of a user for a post are folded into the final one first, so any
+    number of them costs one row write. Voted posts are locked in id order,
+    which serializes concurrent batches without deadlocks. Counters change
+    in one statement and new counts are published. Must be committed by
+    caller.
+
+    Votes for missing posts raise 404 and votes for own posts raise 403,
+    unless not 'strict', then they are dropped.
+    Returns final vote for every applied (post_id, user_id).
+    """
+    post_ids = sorted({post_id for _, post_id, _ in votes})
+    db_query = (
+        select(Post.id, Post.owner_id)
+        .where(Post.id.in_(post_ids))
+        .order_by(Post.id)
+        .with_for_update(key_share=True)
+    )
+    res = await db.execute(db_query)
+    owners = dict(res.tuples().all())
+
+    valid = []
+    for user_id, post_id, vote_type in votes:
+        if post_id not in owners:
+            if strict:
+                raise HTTPException(status.HTTP_404_NOT_FOUND, "No such post.")
+        elif owners[post_id] == user_id:
+            if strict:
+                raise HTTPException(status.HTTP_403_FORBIDDEN, "It's your post.")
+        else:
+            valid.append((post_id, user_id, vote_type))
+    if not valid:
+        return {}
+
+    keys = list(dict.fromkeys((post_id, user_id) for post_id, user_id, _ in valid))
+    db_query = select(Vote.post_id, Vote.user_id, Vote.vote_type).where(
+        tuple_(Vote.post_id, Vote.user_id).in_(keys)
+    )
+    res = await db.execute(db_query)
+    old = {(post_id, user_id): vote for post_id, user_id, vote in res.tuples()}
+
+    final = {key: old.get(key) for key in keys}
+    for post_id, user_id, vote_type in valid:
+        final[post_id, user_id] = toggle_vote(final[post_id, user_id], vote_type)
+
+    changed = [key for key in keys if final[key] != old.get(key)]
+    upserts = [
+        {"post_id": post_id, "user_id": user_id, "vote_type": final[post_id, user_id]}
+        for post_id, user_id in changed
+        if final[post_id, user_id]
+    ]
+    if upserts:
+        db_query = insert(Vote).values(upserts)
+        db_query = db_query.on_conflict_do_update(
+            index_elements=[Vote.post_id, Vote.user_id],
+            set_={"vote_type": db_query.excluded.vote_type},
+        )
+        await db.execute(db_query)
+
+    deletes = [key for key in changed if not final[key]]
+    if deletes:
+        db_query = delete(Vote).where(tuple_(Vote.post_id, Vote.user_id).in_(deletes))
+        await db.execute(db_query)
+
+    deltas: dict[int, tuple[int, int]] = {}
+    for post_id, user_id in changed:
+        likes, dislikes = vote_count_deltas(
+            old.get((post_id, user_id)), final[post_id, user_id]
+        )
+        total_likes, total_dislikes = deltas.get(post_id, (0, 0))
+        deltas[post_id] = (total_likes + likes, total_dislikes + dislikes)
+    if deltas:
+        changes = values(
+            column("post_id", Integer),
+            column("likes", Integer),
+            column("dislikes", Integer),
+            name="changes",
+        ).data([(post_id, *delta) for post_id, delta in deltas.items()])
+        db_query = (
+            update(Post)
+            .where(Post.id == changes.c.post_id)
+            .values(
+                like_count=Post.like_count + changes.c.likes,
+                dislike_count=Post.dislike_count + changes.c.dislikes,
+                last_voted_at=func.now(),
+            )
+            .returning(Post.id, Post.like_count, Post.dislike_count)
+            .execution_options(synchronize_session=False)
+        )
+        res = await db.execute(db_query)
+        await publish_vote_counts(res.tuples().all(), db)
+
+    return final
+
+
+async def discard_user_votes(user_id: int, db: AsyncSession) -> list[int]:
+    """
+    Subtracts all user's votes from posts' counters, returns ids of the posts.
+
+    Votes themselves are removed by 'ON DELETE CASCADE' with the user,
+    so this must run in the same transaction before the user is deleted.
+    """
+    db_query = (
+        update(Post)
+        .where(Post.id == Vote.post_id, Vote.user_id == user_id)
+        .values(
+            like_count=Post.like_count
+            - case((Vote.vote_type == VoteType.LIKE, 1), else_=0),
+            dislike_count=Post.dislike_count
+            - case((Vote.vote_type == VoteType.DISLIKE, 1), else_=0),
+            last_voted_at=func.now(),
+        )
+        .returning(Post.id)
+        .execution_options(synchronize_session=False)
+    )
+    res = await db.execute(db_query)
+    return list(res.scalars().all())
+
+
+def _vote_count_drift_query():
+    actual = (
+        select(
+            Vote.post_id,
+            func.count().filter(Vote.vote_type == VoteType.LIKE).label("likes"),
+            func.count().filter(Vote.vote_type == VoteType.DISLIKE).label("dislikes"),
+        )
+        .group_by(Vote.post_id)
+        .subquery()
+    )
+    likes = func.coalesce(actual.c.likes, 0)
+    dislikes = func.coalesce(actual.c.dislikes, 0)
+    return (
+        select(
+            Post.id,
+            Post.like_count,
+            Post.dislike_count,
+            likes.label("likes"),
+            dislikes.label("dislikes"),
+        )
+        .outerjoin(actual, actual.c.post_id == Post.id)
+        .where(or_(Post.like_count != likes, Post.dislike_count != dislikes))
+    )
+
+
+async def get_vote_count_drift(
+    db: AsyncSession,
+) -> list[tuple[int, int, int, int, int]]:
+    """
+    Finds posts whose counters differ from their votes.
+
+    Returns (post_id, like_count, dislike_count, likes, dislikes) rows,
+    where 'likes' and 'dislikes' are counted from 'votes' table.
+    """
+    res = await db.execute(_vote_count_drift_query().order_by(Post.id))
+    return list(res.tuples().all())
+
+
+async def repair_vote_count_drift(db: AsyncSession) -> int:
+    """
+    Recounts counters of drifted posts and returns number of repaired posts.
+
+    'votes' table is locked against writes until commit, so no vote
+    can slip in between counting and updating.
+    """
+    await db.execute(text("LOCK TABLE votes IN SHARE MODE"))
+
+    drift = _vote_count_drift_query().subquery()
+    db_query = (
+        update(Post)
+        .where(Post.id == drift.c.id)
+        .values(like_count=drift.c.likes, dislike_count=drift.c.dislikes)
+        .execution_options(synchronize_session=False)
+    )
+    res = await db.execute(db_query)
+    return res.rowcount
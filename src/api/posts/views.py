@@ -1,17 +1,30 @@
-from fastapi import APIRouter, status, Depends
+from datetime import datetime
+
+from fastapi import APIRouter, status, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api_models import PostIn, PostOutForUser
+from src.api_models import PostIn, PostOutForUser, VoteIn, VoteOut
+from src.db.replicas import (
+    get_read_session,
+    primary_until,
+    read_sessionmaker,
+    replica_router,
+)
 from src.db.session import get_session
 from src.oauth2.core import get_current_user
-from src.utils_classes import VoteType
+from src.utils_classes import SearchMode, VoteType
+from src.api.posts.responses import post_list_response, post_response
 from src.api.posts.core import (
     create_post,
     delete_post,
+    export_posts,
     vote_post,
+    vote_posts,
     update_post,
     get_all_posts,
     get_single_post,
+    get_trending_posts,
 )
 
 
@@ -30,10 +43,12 @@ posts_router = APIRouter(prefix="/posts", tags=["Posts"])
 )
 async def create_post_view(
     post: PostIn,
+    response: Response,
     user_id: int = Depends(get_current_user),
     db: AsyncSession = Depends(get_session),
 ):
     """Create user's post."""
+    replica_router.stick_to_primary(user_id, response)
     return await create_post(user_id, post, db)
 
 
@@ -43,14 +58,115 @@ async def create_post_view(
     responses={401: {"description": "Could not validate credentials"}},
 )
 async def get_all_posts_view(
+    request: Request,
     query: str = "",
-    offset: int = 0,
-    limit: int = 10,
+    search: SearchMode = SearchMode.SUBSTRING,
+    cursor: str | None = None,
+    offset: int = Query(0, ge=0, deprecated=True),
+    limit: int = Query(10, ge=1, le=100),
+    user_id: int = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session),
+):
+    """
+    Retrieve posts filtered by 'query', newest first.
+
+    To get the next page pass value of 'X-Next-Cursor' response header as
+    'cursor'. The header is absent on the last page.
+    'offset' is kept for backwards compatibility only, use 'cursor' instead.
+
+    With 'search=fulltext' posts matching 'query' are ranked by relevance
+    instead and paginated with 'offset'.
+
+    Answers 304 if page did not change since 'ETag' sent back in
+    'If-None-Match'.
+    """
+    posts, next_cursor = await get_all_posts(
+        query, search, cursor, offset, limit, user_id, db
+    )
+    # Rows are already shaped like the response model, so validation is skipped.
+    return post_list_response(request, posts, next_cursor)
+
+
+@posts_router.get(
+    "/trending",
+    response_model=list[PostOutForUser],
+    responses={401: {"description": "Could not validate credentials"}},
+)
+async def get_trending_posts_view(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(10, ge=1, le=100),
+    user_id: int = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session),
+):
+    """
+    Retrieve hot posts: net votes ranked with gravity, so newer posts need
+    fewer votes to rank the same.
+
+    To get the next page pass value of 'X-Next-Cursor' response header as
+    'cursor'. The header is absent on the last page.
+    """
+    posts, next_cursor = await get_trending_posts(cursor, limit, user_id, db)
+    return post_list_response(request, posts, next_cursor)
+
+
+@posts_router.post(
+    "/votes",
+    response_model=list[VoteOut],
+    responses={
+        401: {"description": "Could not validate credentials"},
+        403: {"description": "It's your post."},
+        404: {"description": "No such post."},
+        422: {"description": "Too many votes."},
+    },
+)
+async def vote_posts_view(
+    votes: list[VoteIn],
+    response: Response,
     user_id: int = Depends(get_current_user),
     db: AsyncSession = Depends(get_session),
 ):
-    """Retrieve all posts from db filtered by 'query', offsetted and limited."""
-    return await get_all_posts(query, offset, limit, user_id, db)
+    """
+    Vote for many posts at once.
+
+    Votes are applied in order, each as 'POST /posts/{post_id}/{vote_type}'
+    would. If any vote is invalid nothing is applied.
+    Returns final vote for every voted post.
+    """
+    replica_router.stick_to_primary(user_id, response)
+    return await vote_posts(votes, user_id, db)
+
+
+@posts_router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}},
+        401: {"description": "Could not validate credentials"},
+    },
+)
+async def export_posts_view(
+    since: datetime | None = None,
+    user_id: int = Depends(get_current_user),
+    until: float = Depends(primary_until),
+):
+    """
+    Stream all posts with their vote counts as NDJSON, one post per line,
+    ordered by id.
+
+    With 'since' only posts edited or voted for at that time or later are
+    streamed, so export can be repeated incrementally. Deleted posts are
+    not reported.
+    """
+    session = read_sessionmaker(user_id, until)
+
+    # Response outlives request's dependencies, so stream has its own session.
+    async def stream():
+        async with session() as db:
+            async for chunk in export_posts(since, db):
+                yield chunk
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 @posts_router.get(
@@ -62,12 +178,19 @@ async def get_all_posts_view(
     },
 )
 async def get_single_post_view(
+    request: Request,
     post_id: int,
     user_id: int = Depends(get_current_user),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ):
-    """Retrieve one post by 'post_id'."""
-    return await get_single_post(user_id, post_id, db)
+    """
+    Retrieve one post by 'post_id'.
+
+    Answers 304 if post did not change since 'ETag' or 'Last-Modified' sent
+    back in 'If-None-Match' or 'If-Modified-Since'.
+    """
+    post = await get_single_post(user_id, post_id, db)
+    return post_response(request, post)
 
 
 @posts_router.delete(
@@ -81,10 +204,12 @@ async def get_single_post_view(
 )
 async def delete_post_view(
     post_id: int,
+    response: Response,
     user_id: int = Depends(get_current_user),
     db: AsyncSession = Depends(get_session),
 ):
     """Delete post by 'post_id' and 'user_id'."""
+    replica_router.stick_to_primary(user_id, response)
     await delete_post(post_id, user_id, db)
 
 
@@ -100,10 +225,12 @@ async def delete_post_view(
 async def update_post_view(
     post_id: int,
     new_post: PostIn,
+    response: Response,
     user_id: int = Depends(get_current_user),
     db: AsyncSession = Depends(get_session),
 ):
     """Update post by 'post_id' and 'user_id'."""
+    replica_router.stick_to_primary(user_id, response)
     return await update_post(post_id, new_post, user_id, db)
 
 
@@ -119,6 +246,7 @@ async def update_post_view(
 async def vote_post_view(
     vote_type: VoteType,
     post_id: int,
+    response: Response,
     user_id: int = Depends(get_current_user),
     db: AsyncSession = Depends(get_session),
 ):
@@ -128,4 +256,5 @@ async def vote_post_view(
     If opposite vote exists then updates vote.
     If same vote exists then discards.
     """
+    replica_router.stick_to_primary(user_id, response)
     await vote_post(vote_type, user_id, post_id, db)
@@ -0,0 +1,100 @@
+from fastapi import HTTPException, status
+from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.session import release_connection
+from src.db_models import Post, User
+from src.settings import settings
+from src.api.posts.utils import (
+    PostRow,
+    decode_cursor,
+    encode_cursor,
+    select_posts_for_user,
+)
+from src.api.users.utils import (
+    add_follow,
+    backfill_timeline,
+    change_follower_count,
+    clear_timeline,
+    remove_follow,
+    select_timeline_page,
+    skip_fan_out,
+    user_exists,
+)
+
+
+async def get_user(user_id: int, db: AsyncSession) -> User:
+    """Retrieves user by 'user_id' from 'db'."""
+    user = await db.get(User, user_id)
+    await release_connection(db)
+    if not user:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "No such user.")
+
+    return user
+
+
+async def follow_user(follower_id: int, followee_id: int, db: AsyncSession) -> None:
+    """
+    Makes 'follower_id' follow 'followee_id'.
+
+    Latest posts of followee are delivered to follower's timeline right away,
+    posts of followees over 'timeline_fanout_max_followers' followers are
+    read from 'posts' instead. Following twice changes nothing.
+    """
+    if follower_id == followee_id:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "It's you.")
+    if not await user_exists(followee_id, db):
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "No such user.")
+
+    if await add_follow(follower_id, followee_id, db):
+        follower_count = await change_follower_count(followee_id, 1, db)
+        if follower_count <= settings.timeline_fanout_max_followers:
+            await backfill_timeline(follower_id, followee_id, db)
+        else:
+            await skip_fan_out(followee_id, db)
+
+    await db.commit()
+
+
+async def unfollow_user(follower_id: int, followee_id: int, db: AsyncSession) -> None:
+    """
+    Makes 'follower_id' stop following 'followee_id'.
+
+    Followee's posts are removed from follower's timeline.
+    Unfollowing user who is not followed changes nothing.
+    """
+    if await remove_follow(follower_id, followee_id, db):
+        await change_follower_count(followee_id, -1, db)
+        await clear_timeline(follower_id, followee_id, db)
+
+    await db.commit()
+
+
+async def get_timeline(
+    cursor: str | None, limit: int, user_id: int, db: AsyncSession
+) -> tuple[list[PostRow], str | None]:
+    """
+    Retrieves user's home timeline, newest first, as plain rows.
+
+    Timeline holds user's own posts and posts of followed users. Page
+    starts right after the post encoded in 'cursor'. Returns posts and
+    cursor of the next page, which is None on the last page.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    page = select_timeline_page(user_id, position, limit + 1).subquery()
+    db_query = (
+        select_posts_for_user(user_id)
+        .join(page, page.c.post_id == Post.id)
+        .order_by(desc(page.c.created_at), desc(page.c.post_id))
+        .limit(limit + 1)
+    )
+    res = await db.execute(db_query)
+    posts = [dict(row) for row in res.mappings()]
+    await release_connection(db)
+
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1]["created_at"], posts[-1]["id"])
+
+    return posts, next_cursor
@@ -0,0 +1,293 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Integer,
+    Select,
+    any_,
+    delete,
+    desc,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    text,
+    true,
+    tuple_,
+    union,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db_models import Follow, Post, TimelineEntry, User
+from src.settings import settings
+
+
+TIMELINE_COLUMNS = ("user_id", "post_id", "created_at")
+
+
+async def user_exists(user_id: int, db: AsyncSession) -> bool:
+    res = await db.execute(select(User.id).where(User.id == user_id))
+    return res.scalar() is not None
+
+
+async def fan_out_posts(post_ids: list[int], db: AsyncSession) -> None:
+    """
+    Delivers posts to timelines of their authors and the authors' followers.
+
+    Posts of authors with more than 'timeline_fanout_max_followers' followers
+    are delivered only to the author, and the author is marked with
+    'fanout_skipped', so followers read the author's posts from 'posts'
+    instead (see 'select_timeline_page'). The mark stays, so these posts are
+    not lost if the author falls back under the threshold. Authors are
+    locked until commit, so the threshold can't be crossed meanwhile.
+    """
+    in_posts = Post.id == any_(literal(post_ids, ARRAY(Integer)))
+    skipped = User.follower_count > settings.timeline_fanout_max_followers
+    db_query = (
+        update(User)
+        .where(User.id.in_(select(Post.owner_id).where(in_posts)))
+        .values(fanout_skipped=User.fanout_skipped | skipped)
+        .returning(User.id, skipped)
+        .execution_options(synchronize_session=False)
+    )
+    res = await db.execute(db_query)
+    fanned_out = [owner_id for owner_id, skip in res.tuples() if not skip]
+
+    own = select(Post.owner_id, Post.id, Post.created_at).where(in_posts)
+    followers = (
+        select(Follow.follower_id, Post.id, Post.created_at)
+        .join(Follow, Follow.followee_id == Post.owner_id)
+        .where(in_posts, Post.owner_id == any_(literal(fanned_out, ARRAY(Integer))))
+    )
+    db_query = insert(TimelineEntry).from_select(
+        TIMELINE_COLUMNS, union_all(own, followers)
+    )
+    await db.execute(db_query)
+
+
+async def change_follower_count(user_id: int, delta: int, db: AsyncSession) -> int:
+    """Shifts user's follower counter by 'delta' and returns the new value."""
+    db_query = (
+        update(User)
+        .where(User.id == user_id)
+        .values(follower_count=User.follower_count + delta)
+        .returning(User.follower_count)
+        .execution_options(synchronize_session=False)
+    )
+    res = await db.execute(db_query)
+    return res.scalar_one()
+
+
+async def skip_fan_out(user_id: int, db: AsyncSession) -> None:
+    """
+    Marks user with 'fanout_skipped', so followers read the user's posts
+    from 'posts' (see 'select_timeline_page').
+    """
+    db_query = (
+        update(User)
+        .where(User.id == user_id, User.fanout_skipped.is_(False))
+        .values(fanout_skipped=True)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(db_query)
+
+
+async def change_post_count(user_id: int, delta: int, db: AsyncSession) -> None:
+    """Shifts user's post counter by 'delta'."""
+    db_query = (
+        update(User)
+        .where(User.id == user_id)
+        .values(post_count=User.post_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(db_query)
+
+
+async def add_follow(follower_id: int, followee_id: int, db: AsyncSession) -> bool:
+    """Stores follow, returns False if it already exists."""
+    db_query = (
+        pg_insert(Follow)
+        .values(follower_id=follower_id, followee_id=followee_id)
+        .on_conflict_do_nothing()
+        .returning(Follow.follower_id)
+    )
+    res = await db.execute(db_query)
+    return res.scalar() is not None
+
+
+async def remove_follow(follower_id: int, followee_id: int, db: AsyncSession) -> bool:
+    """Removes follow, returns False if there was none."""
+    db_query = (
+        delete(Follow)
+        .where(Follow.follower_id == follower_id, Follow.followee_id == followee_id)
+        .returning(Follow.follower_id)
+    )
+    res = await db.execute(db_query)
+    return res.scalar() is not None
+
+
+async def backfill_timeline(
+    follower_id: int, followee_id: int, db: AsyncSession
+) -> None:
+    """Delivers latest 'timeline_backfill_posts' posts of followee to follower."""
+    recent = (
+        select(Post.id.label("post_id"), Post.created_at)
+        .where(Post.owner_id == followee_id)
+        .order_by(desc(Post.created_at), desc(Post.id))
+        .limit(settings.timeline_backfill_posts)
+        .subquery()
+    )
+    db_query = (
+        pg_insert(TimelineEntry)
+        .from_select(
+            TIMELINE_COLUMNS,
+            select(follower_id, recent.c.post_id, recent.c.created_at),
+        )
+        .on_conflict_do_nothing()
+    )
+    await db.execute(db_query)
+
+
+async def clear_timeline(follower_id: int, followee_id: int, db: AsyncSession) -> None:
+    """Removes followee's posts from follower's timeline."""
+    db_query = (
+        delete(TimelineEntry)
+        .where(
+            TimelineEntry.user_id == follower_id,
+            TimelineEntry.post_id.in_(
+                select(Post.id).where(Post.owner_id == followee_id)
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(db_query)
+
+
+async def discard_user_follows(user_id: int, db: AsyncSession) -> None:
+    """
+    Subtracts user from follower counters of everyone the user follows.
+
+    Follows themselves are removed by 'ON DELETE CASCADE' with the user,
+    so this must run in the same transaction before the user is deleted.
+    """
+    db_query = (
+        update(User)
+        .where(User.id == Follow.followee_id, Follow.follower_id == user_id)
+        .values(follower_count=User.follower_count - 1)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(db_query)
+
+
+def select_timeline_page(
+    user_id: int, position: tuple[datetime, int] | None, limit: int
+) -> Select:
+    """
+    Selects (post_id, created_at) of one page of user's home timeline.
+
+    Fanned out posts are a range scan of the user's timeline entries, posts
+    of followed authors whose posts were not all fanned out are read from
+    'posts' directly. Both parts are limited before they are merged.
+    """
+    entries = select(
+        TimelineEntry.post_id, TimelineEntry.created_at.label("created_at")
+    ).where(TimelineEntry.user_id == user_id)
+    if position:
+        entries = entries.where(
+            tuple_(TimelineEntry.created_at, TimelineEntry.post_id) < position
+        )
+    entries = entries.order_by(
+        desc(TimelineEntry.created_at), desc(TimelineEntry.post_id)
+    ).limit(limit)
+
+    # Latest posts of every such author are an index range scan each, which
+    # beats walking all posts by time looking for followed authors.
+    authors = (
+        select(Follow.followee_id)
+        .join(User, User.id == Follow.followee_id)
+        .where(Follow.follower_id == user_id, User.fanout_skipped)
+        .subquery()
+    )
+    recent = select(
+        Post.id.label("post_id"), Post.created_at.label("created_at")
+    ).where(Post.owner_id == authors.c.followee_id)
+    if position:
+        recent = recent.where(tuple_(Post.created_at, Post.id) < position)
+    recent = (
+        recent.order_by(desc(Post.created_at), desc(Post.id)).limit(limit).lateral()
+    )
+    celebrities = (
+        select(recent.c.post_id, recent.c.created_at)
+        .select_from(authors)
+        .join(recent, true())
+        .order_by(desc(recent.c.created_at), desc(recent.c.post_id))
+        .limit(limit)
+    )
+
+    parts = [part.subquery().select() for part in (entries, celebrities)]
+    # Author who crossed the threshold has posts in both parts.
+    return union(*parts)
+
+
+def _user_count_drift_query():
+    posts = (
+        select(Post.owner_id, func.count().label("posts"))
+        .group_by(Post.owner_id)
+        .subquery()
+    )
+    followers = (
+        select(Follow.followee_id, func.count().label("followers"))
+        .group_by(Follow.followee_id)
+        .subquery()
+    )
+    post_count = func.coalesce(posts.c.posts, 0)
+    follower_count = func.coalesce(followers.c.followers, 0)
+    return (
+        select(
+            User.id,
+            User.post_count,
+            User.follower_count,
+            post_count.label("posts"),
+            follower_count.label("followers"),
+        )
+        .outerjoin(posts, posts.c.owner_id == User.id)
+        .outerjoin(followers, followers.c.followee_id == User.id)
+        .where(
+            or_(User.post_count != post_count, User.follower_count != follower_count)
+        )
+    )
+
+
+async def get_user_count_drift(
+    db: AsyncSession,
+) -> list[tuple[int, int, int, int, int]]:
+    """
+    Finds users whose counters differ from their posts and followers.
+
+    Returns (user_id, post_count, follower_count, posts, followers) rows,
+    where 'posts' and 'followers' are counted from 'posts' and 'follows' tables.
+    """
+    res = await db.execute(_user_count_drift_query().order_by(User.id))
+    return list(res.tuples().all())
+
+
+async def repair_user_count_drift(db: AsyncSession) -> int:
+    """
+    Recounts counters of drifted users and returns number of repaired users.
+
+    'posts' and 'follows' tables are locked against writes until commit.
+    """
+    await db.execute(text("LOCK TABLE posts, follows IN SHARE MODE"))
+
+    drift = _user_count_drift_query().subquery()
+    db_query = (
+        update(User)
+        .where(User.id == drift.c.id)
+        .values(post_count=drift.c.posts, follower_count=drift.c.followers)
+        .execution_options(synchronize_session=False)
+    )
+    res = await db.execute(db_query)
+    return res.rowcount
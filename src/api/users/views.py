@@ -0,0 +1,120 @@
+from fastapi import APIRouter, status, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api_models import PostOutForUser, UserOut
+from src.db.replicas import get_read_session, replica_router
+from src.db.session import get_session
+from src.oauth2.core import get_current_user
+from src.api.posts.core import get_user_posts
+from src.api.posts.responses import post_list_response
+from src.api.users.core import follow_user, get_timeline, get_user, unfollow_user
+
+
+users_router = APIRouter(prefix="/users", tags=["Users"])
+
+
+@users_router.get(
+    "/me/timeline",
+    response_model=list[PostOutForUser],
+    responses={401: {"description": "Could not validate credentials"}},
+)
+async def get_timeline_view(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(10, ge=1, le=100),
+    user_id: int = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session),
+):
+    """
+    Retrieve user's own posts and posts of followed users, newest first.
+
+    To get the next page pass value of 'X-Next-Cursor' response header as
+    'cursor'. The header is absent on the last page.
+    Answers 304 if page did not change since 'ETag' sent back in
+    'If-None-Match'.
+    """
+    posts, next_cursor = await get_timeline(cursor, limit, user_id, db)
+    # Rows are already shaped like the response model, so validation is skipped.
+    return post_list_response(request, posts, next_cursor)
+
+
+@users_router.post(
+    "/{followee_id}/follow",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        401: {"description": "Could not validate credentials"},
+        403: {"description": "It's you."},
+        404: {"description": "No such user."},
+    },
+)
+async def follow_user_view(
+    followee_id: int,
+    response: Response,
+    user_id: int = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    """Follow user by 'followee_id'."""
+    replica_router.stick_to_primary(user_id, response)
+    await follow_user(user_id, followee_id, db)
+
+
+@users_router.delete(
+    "/{followee_id}/follow",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={401: {"description": "Could not validate credentials"}},
+)
+async def unfollow_user_view(
+    followee_id: int,
+    response: Response,
+    user_id: int = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    """Stop following user by 'followee_id'."""
+    replica_router.stick_to_primary(user_id, response)
+    await unfollow_user(user_id, followee_id, db)
+
+
+@users_router.get(
+    "/{owner_id}",
+    response_model=UserOut,
+    responses={
+        401: {"description": "Could not validate credentials"},
+        404: {"description": "No such user."},
+    },
+)
+async def get_user_view(
+    owner_id: int,
+    user_id: int = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session),
+):
+    """Retrieve user by 'owner_id'."""
+    return await get_user(owner_id, db)
+
+
+@users_router.get(
+    "/{owner_id}/posts",
+    response_model=list[PostOutForUser],
+    responses={
+        401: {"description": "Could not validate credentials"},
+        404: {"description": "No such user."},
+    },
+)
+async def get_user_posts_view(
+    request: Request,
+    owner_id: int,
+    cursor: str | None = None,
+    limit: int = Query(10, ge=1, le=100),
+    user_id: int = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session),
+):
+    """
+    Retrieve posts of user 'owner_id', newest first.
+
+    To get the next page pass value of 'X-Next-Cursor' response header as
+    'cursor'. The header is absent on the last page.
+    Answers 304 if page did not change since 'ETag' sent back in
+    'If-None-Match'.
+    """
+    posts, next_cursor = await get_user_posts(owner_id, cursor, limit, user_id, db)
+    # Rows are already shaped like the response model, so validation is skipped.
+    return post_list_response(request, posts, next_cursor)
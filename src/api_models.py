@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
 from src.utils_classes import VoteType
 
@@ -13,6 +13,7 @@ class UserIn(BaseModel):
 class UserOut(BaseModel):
     id: int
     username: str
+    post_count: int
     created_at: datetime
 
     class Config:
@@ -45,3 +46,52 @@ class PostOutForUser(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class VoteIn(BaseModel):
+    post_id: int
+    vote_type: VoteType
+
+
+class VoteOut(BaseModel):
+    post_id: int
+    voted: VoteType | None
+
+
+class ImportRecord(BaseModel):
+    @field_validator("*")
+    @classmethod
+    def reject_nul(cls, value):
+        # Valid in JSON, but Postgres text can't hold it.
+        if isinstance(value, str) and "\x00" in value:
+            raise ValueError("NUL character is not allowed")
+        return value
+
+
+class ImportUser(ImportRecord):
+    username: str
+    password_hash: str
+    created_at: datetime | None = None
+
+
+class ImportPost(ImportRecord):
+    username: str
+    content: str
+    created_at: datetime | None = None
+
+
+class ImportVote(ImportRecord):
+    username: str
+    post_id: int
+    vote_type: VoteType
+
+
+class ImportRowError(BaseModel):
+    line: int
+    detail: str
+
+
+class ImportResult(BaseModel):
+    imported: int
+    ids: list[int | None]
+    errors: list[ImportRowError]
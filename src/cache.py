@@ -0,0 +1,185 @@
+import asyncio
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Awaitable, Callable
+
+import orjson
+
+from src.settings import settings
+
+
+MISSING = object()
+
+
+class Cache(ABC):
+    """
+    Base of cache backends.
+
+    Keeps hit/miss/eviction counters and makes sure only one coroutine
+    of the process loads a missing key, others wait for its result.
+    'shared' caches are seen by all workers, the others have to be told
+    about changes made by other workers.
+    """
+
+    shared = True
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._loading: dict[str, asyncio.Future] = {}
+        self._invalidated_while_loading: set[str] = set()
+
+    @abstractmethod
+    async def get(self, key: str) -> Any:
+        """Returns cached value or 'MISSING'."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        pass
+
+    async def clear(self) -> None:
+        """Drops entries kept in process memory, if there are any."""
+
+    async def get_or_load(self, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        value = await self.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        loading = self._loading.get(key)
+        if loading:
+            return await asyncio.shield(loading)
+
+        loading = asyncio.get_running_loop().create_future()
+        self._loading[key] = loading
+        try:
+            value = await load()
+            if key not in self._invalidated_while_loading:
+                await self.set(key, value)
+            loading.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            loading.cancel()
+            raise
+        except Exception as e:
+            loading.set_exception(e)
+            # Waiters get the exception, nobody else has to retrieve it.
+            loading.exception()
+            raise
+        finally:
+            del self._loading[key]
+            self._invalidated_while_loading.discard(key)
+
+    async def invalidate(self, *keys: str) -> None:
+        """
+        Drops 'keys' from cache.
+
+        Values being loaded for these keys right now may be already stale,
+        so they are not stored.
+        """
+        self._invalidated_while_loading.update(
+            key for key in keys if key in self._loading
+        )
+        await self.delete(*keys)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class NoCache(Cache):
+    """Cache which never stores anything."""
+
+    async def get(self, key: str) -> Any:
+        return MISSING
+
+    async def set(self, key: str, value: Any) -> None:
+        pass
+
+    async def delete(self, *keys: str) -> None:
+        pass
+
+
+class MemoryCache(Cache):
+    """In-process LRU cache, entries expire after 'ttl' seconds."""
+
+    shared = False
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        super().__init__()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    async def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING
+
+        expires_at, value = entry
+        if expires_at < monotonic():
+            del self._entries[key]
+            return MISSING
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+
+class RedisCache(Cache):
+    """
+    Cache in Redis or any server speaking its protocol.
+
+    Values are stored as JSON, so datetimes and enums come back as strings.
+    Needs 'redis' package, which is not installed by default.
+    """
+
+    def __init__(self, url: str, ttl: float) -> None:
+        super().__init__()
+        from redis.asyncio import Redis
+
+        self.ttl = ttl
+        self.redis = Redis.from_url(url)
+
+    async def get(self, key: str) -> Any:
+        raw = await self.redis.get(key)
+        if raw is None:
+            return MISSING
+        return orjson.loads(raw)
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.redis.set(key, orjson.dumps(value), px=int(self.ttl * 1000))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.redis.delete(*keys)
+
+
+def create_cache() -> Cache:
+    if settings.cache_backend == "redis":
+        return RedisCache(settings.redis_url, settings.cache_ttl_seconds)
+    if settings.cache_backend == "memory":
+        return MemoryCache(settings.cache_ttl_seconds, settings.cache_max_entries)
+    return NoCache()
+
+
+cache = create_cache()
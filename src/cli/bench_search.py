@@ -0,0 +1,120 @@
+import asyncio
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+from typing import Any
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.session import engine
+from src.utils_classes import SearchMode
+from src.api.posts.core import get_all_posts
+from src.cli.explain import iter_plan
+
+
+arg_parser = ArgumentParser(
+    description=(
+        "Compares plans of searching posts: substring search with LIKE, the "
+        "only one before full-text mode, without and with trigram index, and "
+        "full-text search ranked by relevance. Run against a database seeded "
+        "by 'src.cli.seed'. The trigram index is dropped in a transaction "
+        "which is rolled back, but 'posts' is locked meanwhile, so use a "
+        "benchmark database."
+    )
+)
+arg_parser.add_argument(
+    "--queries",
+    dest="queries",
+    nargs="+",
+    default=["coffee", "city weather", "travel photo friends", "zebra"],
+    help="Seeded posts are made of words like these, 'zebra' matches nothing.",
+)
+arg_parser.add_argument("--limit", dest="limit", type=int, default=20)
+arg_parser.add_argument(
+    "--repeat",
+    dest="repeat",
+    type=int,
+    default=5,
+    help="Every search runs that many times, median time is reported.",
+)
+
+TRIGRAM_INDEX = "ix_posts_content_trgm"
+
+
+async def time_search(
+    query: str, search: SearchMode, limit: int, repeat: int, trigrams: bool
+) -> tuple[float, list[str]]:
+    """
+    Searches posts like 'GET /posts' does, returns median seconds and how
+    'posts' was scanned.
+    """
+    statements: list[tuple[str, Any]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        if not trigrams:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {TRIGRAM_INDEX}"))
+        db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+
+        seconds = []
+        for attempt in range(repeat):
+            if not attempt:
+                event.listen(engine.sync_engine, "before_cursor_execute", record)
+            start = perf_counter()
+            await get_all_posts(query, search, None, 0, limit, 0, db)
+            seconds.append(perf_counter() - start)
+            if not attempt:
+                event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+        statement, parameters = next(
+            (statement, parameters)
+            for statement, parameters in statements
+            if statement.lstrip().upper().startswith("SELECT")
+        )
+        res = await conn.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+        )
+        scans = [
+            " ".join([node["Node Type"], node.get("Index Name", "")]).strip()
+            for node in iter_plan(res.scalar()[0]["Plan"])
+            if node.get("Relation Name") == "posts"
+            or node.get("Index Name", "").startswith("ix_posts")
+        ]
+
+        await transaction.rollback()
+    return median(seconds), scans
+
+
+async def bench(args) -> None:
+    async with engine.connect() as conn:
+        trigram_indexed = await conn.scalar(
+            text("SELECT 1 FROM pg_indexes WHERE indexname = :name"),
+            {"name": TRIGRAM_INDEX},
+        )
+        posts = await conn.scalar(text("SELECT count(*) FROM posts"))
+
+    plans = [("LIKE", SearchMode.SUBSTRING, False)]
+    if trigram_indexed:
+        plans.append(("LIKE, trigram index", SearchMode.SUBSTRING, True))
+    plans.append(("full-text, ranked", SearchMode.FULLTEXT, True))
+
+    print(f"First {args.limit} results of searching {posts} posts:")
+    print(f"{'query':22} {'plan':20} {'ms':>9}  posts scanned by")
+    for query in args.queries:
+        for name, search, trigrams in plans:
+            seconds, scans = await time_search(
+                query, search, args.limit, args.repeat, trigrams
+            )
+            print(f"{query:22} {name:20} {seconds * 1000:>9.1f}  {', '.join(scans)}")
+    if not trigram_indexed:
+        print(f"No '{TRIGRAM_INDEX}', 'pg_trgm' extension was not available.")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(arg_parser.parse_args()))
@@ -0,0 +1,118 @@
+import asyncio
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+from typing import Any, Callable
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import desc, select
+
+from src.api_models import PostOutForUser
+from src.db.session import async_session, engine
+from src.db_models import Post
+from src.api.posts.utils import select_posts_for_user
+
+
+arg_parser = ArgumentParser(
+    description=(
+        "Measures what building a response of posts costs: loading them as "
+        "ORM objects and serializing them through the response model with "
+        "'json', as post lists were served before, against loading plain rows "
+        "and serializing them with 'orjson'. Reads the latest posts of the "
+        "database, nothing is written."
+    )
+)
+arg_parser.add_argument("--posts", dest="posts", type=int, default=1_000)
+arg_parser.add_argument(
+    "--repeat",
+    dest="repeat",
+    type=int,
+    default=20,
+    help="Every step runs that many times, median time is reported.",
+)
+
+posts_adapter = TypeAdapter(list[PostOutForUser])
+
+
+async def load_objects(count: int) -> list[Post]:
+    async with async_session() as db:
+        res = await db.execute(select(Post).order_by(desc(Post.id)).limit(count))
+        posts = list(res.scalars())
+    for post in posts:
+        post.voted = None
+    return posts
+
+
+async def load_rows(count: int) -> list[dict[str, Any]]:
+    async with async_session() as db:
+        res = await db.execute(
+            select_posts_for_user(0).order_by(desc(Post.id)).limit(count)
+        )
+        rows = [dict(row) for row in res.mappings()]
+    # Views take it out for the ETag before responding.
+    for row in rows:
+        del row["last_voted_at"]
+    return rows
+
+
+def model_json(posts: list[Post]) -> bytes:
+    """What a view returning ORM objects with 'response_model' did."""
+    content = jsonable_encoder(
+        posts_adapter.validate_python(posts, from_attributes=True)
+    )
+    return JSONResponse(content).body
+
+
+def model_orjson(posts: list[Post]) -> bytes:
+    content = jsonable_encoder(
+        posts_adapter.validate_python(posts, from_attributes=True)
+    )
+    return ORJSONResponse(content).body
+
+
+def rows_orjson(rows: list[dict[str, Any]]) -> bytes:
+    return ORJSONResponse(rows).body
+
+
+async def time_async(load: Callable, count: int, repeat: int) -> tuple[float, Any]:
+    seconds = []
+    for _ in range(repeat):
+        start = perf_counter()
+        loaded = await load(count)
+        seconds.append(perf_counter() - start)
+    return median(seconds), loaded
+
+
+def time_sync(serialize: Callable, loaded: Any, repeat: int) -> float:
+    seconds = []
+    for _ in range(repeat):
+        start = perf_counter()
+        serialize(loaded)
+        seconds.append(perf_counter() - start)
+    return median(seconds)
+
+
+async def bench(args) -> None:
+    objects_seconds, objects = await time_async(load_objects, args.posts, args.repeat)
+    rows_seconds, rows = await time_async(load_rows, args.posts, args.repeat)
+    await engine.dispose()
+    if orjson.loads(model_json(objects))[0].keys() != rows[0].keys():
+        raise SystemExit("Rows are not shaped like the response model.")
+
+    per_thousand = 1_000 / len(rows)
+    print(f"Milliseconds per 1000 posts, median of {args.repeat} runs:")
+    for name, seconds in (
+        ("load ORM objects", objects_seconds),
+        ("load plain rows", rows_seconds),
+        ("response model, json", time_sync(model_json, objects, args.repeat)),
+        ("response model, orjson", time_sync(model_orjson, objects, args.repeat)),
+        ("plain rows, orjson", time_sync(rows_orjson, rows, args.repeat)),
+    ):
+        print(f"{name:24} {seconds * 1000 * per_thousand:>8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(arg_parser.parse_args()))
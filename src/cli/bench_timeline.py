@@ -0,0 +1,129 @@
+import asyncio
+import random
+from argparse import ArgumentParser
+from statistics import quantiles
+from time import perf_counter
+
+from sqlalchemy import desc, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.session import engine
+from src.db_models import Follow, Post, User
+from src.settings import settings
+from src.api.users.utils import fan_out_posts, select_timeline_page
+
+
+arg_parser = ArgumentParser(
+    description=(
+        "Compares reading home timelines from fanned out entries with joining "
+        "followed users' posts, and measures what fan-out costs posts of "
+        "authors by number of followers. Run against a database seeded by "
+        "'src.cli.seed', whose follower graph follows power law. Writes are "
+        "rolled back."
+    )
+)
+arg_parser.add_argument(
+    "--readers",
+    dest="readers",
+    type=int,
+    default=200,
+    help="Timelines of that many users following the most others are read.",
+)
+arg_parser.add_argument("--limit", dest="limit", type=int, default=20)
+arg_parser.add_argument(
+    "--authors",
+    dest="authors",
+    type=int,
+    nargs="+",
+    default=[10, 100, 1_000, 10_000, 100_000],
+    help="Fan-out is measured for authors with about these numbers of followers.",
+)
+arg_parser.add_argument("--random-seed", dest="random_seed", type=int, default=42)
+
+
+def percentiles_ms(seconds: list[float]) -> str:
+    points = quantiles(seconds, n=100)
+    return f"p50 {points[49] * 1000:.2f} ms, p99 {points[98] * 1000:.2f} ms"
+
+
+async def time_reads(user_ids: list[int], limit: int) -> tuple[list, list]:
+    """Reads the first page of every user's timeline both ways."""
+    fanned, joined = [], []
+    async with engine.connect() as conn:
+        for user_id in user_ids:
+            page = select_timeline_page(user_id, None, limit).subquery()
+            db_query = (
+                select(Post.id)
+                .join(page, page.c.post_id == Post.id)
+                .order_by(desc(page.c.created_at), desc(page.c.post_id))
+                .limit(limit)
+            )
+            start = perf_counter()
+            await conn.execute(db_query)
+            fanned.append(perf_counter() - start)
+
+            db_query = (
+                select(Post.id)
+                .join(Follow, Follow.followee_id == Post.owner_id)
+                .where(Follow.follower_id == user_id)
+                .order_by(desc(Post.created_at), desc(Post.id))
+                .limit(limit)
+            )
+            start = perf_counter()
+            await conn.execute(db_query)
+            joined.append(perf_counter() - start)
+    return fanned, joined
+
+
+async def time_fan_out(author_id: int) -> float:
+    """Creates a post of the author and fans it out, returns seconds."""
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+        res = await db.execute(
+            insert(Post).values(owner_id=author_id, content="bench").returning(Post.id)
+        )
+        post_id = res.scalar_one()
+
+        start = perf_counter()
+        await fan_out_posts([post_id], db)
+        seconds = perf_counter() - start
+
+        await transaction.rollback()
+    return seconds
+
+
+async def bench(args) -> None:
+    rnd = random.Random(args.random_seed)
+    async with engine.connect() as conn:
+        res = await conn.execute(
+            select(Follow.follower_id)
+            .group_by(Follow.follower_id)
+            .order_by(desc(func.count()))
+            .limit(args.readers)
+        )
+        readers = list(res.scalars())
+        res = await conn.execute(select(User.id, User.follower_count))
+        followers = dict(res.tuples().all())
+
+    rnd.shuffle(readers)
+    fanned, joined = await time_reads(readers, args.limit)
+    print(f"Timelines of {len(readers)} users following the most others:")
+    print(f"  fanned out entries: {percentiles_ms(fanned)}")
+    print(f"  join over follows:  {percentiles_ms(joined)}")
+
+    print(
+        f"Fan-out of a post (authors over {settings.timeline_fanout_max_followers} "
+        f"followers are read on timeline reads instead):"
+    )
+    print(f"{'followers':>10} {'ms':>9}")
+    for target in args.authors:
+        author_id = min(followers, key=lambda user: abs(followers[user] - target))
+        seconds = await time_fan_out(author_id)
+        print(f"{followers[author_id]:>10} {seconds * 1000:>9.1f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(arg_parser.parse_args()))
@@ -0,0 +1,131 @@
+import asyncio
+import random
+from argparse import ArgumentParser
+from time import perf_counter
+
+from sqlalchemy import Integer, cast, desc, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.session import engine
+from src.db_models import Post, User, Vote
+from src.settings import settings
+from src.utils_classes import VoteType
+from src.api.posts.utils import apply_votes
+
+
+arg_parser = ArgumentParser(
+    description=(
+        "Measures what keeping 'hot_score' up to date costs votes, with and "
+        "without its index, and how trending posts read compares to ranking "
+        "them from 'votes'. Everything runs in transactions which are rolled "
+        "back, but 'posts' is locked meanwhile, so use a benchmark database."
+    )
+)
+arg_parser.add_argument(
+    "--votes",
+    dest="votes",
+    type=int,
+    nargs="+",
+    default=[1_000, 10_000, 100_000],
+    help="Numbers of votes to apply.",
+)
+arg_parser.add_argument(
+    "--posts",
+    dest="posts",
+    type=int,
+    default=10_000,
+    help="Votes go to that many latest posts.",
+)
+arg_parser.add_argument("--random-seed", dest="random_seed", type=int, default=42)
+
+TOP = 20
+
+
+async def time_votes(votes: list[tuple[int, int, VoteType]], indexed: bool) -> float:
+    """Applies votes in batches like 'POST /posts/votes' does, returns seconds."""
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        if not indexed:
+            await conn.execute(text("DROP INDEX ix_posts_hot_score"))
+        db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+
+        start = perf_counter()
+        for offset in range(0, len(votes), settings.vote_batch_max_size):
+            batch = votes[offset : offset + settings.vote_batch_max_size]
+            await apply_votes(batch, db, strict=False)
+            await db.flush()
+        seconds = perf_counter() - start
+
+        await transaction.rollback()
+    return seconds
+
+
+async def time_query(db_query) -> float:
+    async with engine.connect() as conn:
+        start = perf_counter()
+        await conn.execute(db_query)
+        return perf_counter() - start
+
+
+async def bench(args) -> None:
+    rnd = random.Random(args.random_seed)
+    async with engine.connect() as conn:
+        res = await conn.execute(
+            select(Post.id).order_by(desc(Post.id)).limit(args.posts)
+        )
+        post_ids = list(res.scalars())
+        res = await conn.execute(select(User.id).limit(max(args.votes)))
+        user_ids = list(res.scalars())
+
+    print(
+        f"{'votes':>8} {'indexed s':>10} {'votes/s':>9} "
+        f"{'no index s':>11} {'votes/s':>9}"
+    )
+    for count in args.votes:
+        votes = [
+            (
+                rnd.choice(user_ids),
+                rnd.choice(post_ids),
+                rnd.choice([VoteType.LIKE, VoteType.DISLIKE]),
+            )
+            for _ in range(count)
+        ]
+        indexed = await time_votes(votes, indexed=True)
+        plain = await time_votes(votes, indexed=False)
+        print(
+            f"{count:>8} {indexed:>10.2f} {count / indexed:>9.0f} "
+            f"{plain:>11.2f} {count / plain:>9.0f}"
+        )
+
+    stored = select(Post.id).order_by(desc(Post.hot_score), desc(Post.id)).limit(TOP)
+    counts = (
+        select(
+            Vote.post_id,
+            func.count().filter(Vote.vote_type == VoteType.LIKE).label("likes"),
+            func.count().filter(Vote.vote_type == VoteType.DISLIKE).label("dislikes"),
+        )
+        .group_by(Vote.post_id)
+        .subquery()
+    )
+    counted = (
+        select(Post.id)
+        .join(counts, counts.c.post_id == Post.id)
+        .order_by(
+            desc(
+                func.hot_score(
+                    cast(counts.c.likes, Integer),
+                    cast(counts.c.dislikes, Integer),
+                    Post.created_at,
+                )
+            )
+        )
+        .limit(TOP)
+    )
+    for name, db_query in (("stored score", stored), ("counted votes", counted)):
+        print(f"Top {TOP} by {name}: {await time_query(db_query) * 1000:.1f} ms.")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(arg_parser.parse_args()))
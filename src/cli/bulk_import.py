@@ -0,0 +1,54 @@
+import asyncio
+import sys
+from argparse import ArgumentParser
+
+from src.db.session import async_session, engine
+from src.utils_classes import ImportFormat, ImportKind
+from src.api.imports.core import import_records
+
+
+arg_parser = ArgumentParser(
+    description=(
+        "Imports users, posts or votes from NDJSON or CSV file in batches. "
+        "Same as 'POST /import/{kind}', see its docs for fields."
+    )
+)
+arg_parser.add_argument("kind", type=ImportKind, choices=list(ImportKind))
+arg_parser.add_argument("file")
+arg_parser.add_argument(
+    "--format",
+    dest="format",
+    type=ImportFormat,
+    choices=list(ImportFormat),
+    default=None,
+    help="By file extension, NDJSON unless it is '.csv'.",
+)
+arg_parser.add_argument(
+    "--ids",
+    dest="ids",
+    default=None,
+    help="File to write id of every record to, one per line, empty if rejected.",
+)
+
+
+async def bulk_import(args) -> int:
+    """Imports file, prints rejected records and returns number of them."""
+    fmt = args.format or (
+        ImportFormat.CSV if args.file.endswith(".csv") else ImportFormat.NDJSON
+    )
+    with open(args.file, encoding="utf-8", newline="") as lines:
+        async with async_session() as db:
+            result = await import_records(args.kind, lines, fmt, db)
+    await engine.dispose()
+
+    for error in result["errors"]:
+        print(f"line {error['line']}: {error['detail']}", file=sys.stderr)
+    if args.ids:
+        with open(args.ids, "w") as file:
+            file.writelines(f"{id or ''}\n" for id in result["ids"])
+    print(f"Imported {result['imported']}, rejected {len(result['errors'])}.")
+    return len(result["errors"])
+
+
+if __name__ == "__main__":
+    raise SystemExit(1 if asyncio.run(bulk_import(arg_parser.parse_args())) else 0)
@@ -0,0 +1,167 @@
+import asyncio
+import json
+from argparse import ArgumentParser
+from typing import Any, Iterator
+from uuid import uuid4
+
+from fastapi.security.oauth2 import OAuth2PasswordRequestForm
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api_models import PostIn, UserIn, VoteIn
+from src.db.session import engine
+from src.oauth2.core import create_access_token, get_current_user
+from src.utils_classes import ImportFormat, ImportKind, SearchMode, VoteType
+from src.api.auth.core import create_user, delete_user, get_token
+from src.api.auth.utils import pass_context
+from src.api.imports.core import import_records
+from src.api.posts.core import (
+    create_post,
+    delete_post,
+    get_all_posts,
+    get_single_post,
+    get_trending_posts,
+    get_user_posts,
+    update_post,
+    vote_post,
+    vote_posts,
+)
+from src.api.users.core import (
+    follow_user,
+    get_timeline,
+    get_user,
+    unfollow_user,
+)
+
+
+arg_parser = ArgumentParser(
+    description=(
+        "Runs queries of every endpoint against the database and reports "
+        "sequential scans of big tables. Nothing is left in the database."
+    )
+)
+arg_parser.add_argument(
+    "--min-rows",
+    dest="min_rows",
+    type=int,
+    default=10_000,
+    help="Sequential scans of tables with fewer rows are fine.",
+)
+
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+async def run_endpoints(db: AsyncSession) -> None:
+    """Does what requests to every endpoint querying the database do."""
+    password = uuid4().hex
+    author = await create_user(UserIn(username=uuid4().hex, password=password), db)
+    reader = await create_user(UserIn(username=uuid4().hex, password=password), db)
+    await get_token(
+        OAuth2PasswordRequestForm(username=author.username, password=password), db
+    )
+    await get_current_user(create_access_token({"user_id": reader.id}), db)
+
+    post = await create_post(author.id, PostIn(content="explain"), db)
+    _, cursor = await get_all_posts("", SearchMode.SUBSTRING, None, 0, 1, reader.id, db)
+    await get_all_posts("", SearchMode.SUBSTRING, cursor, 0, 1, reader.id, db)
+    await get_all_posts("explain", SearchMode.SUBSTRING, None, 0, 10, reader.id, db)
+    await get_all_posts("explain", SearchMode.FULLTEXT, None, 0, 10, reader.id, db)
+    await get_single_post(reader.id, post.id, db)
+    _, cursor = await get_trending_posts(None, 1, reader.id, db)
+    await get_trending_posts(cursor, 1, reader.id, db)
+    await get_user(author.id, db)
+    _, cursor = await get_user_posts(author.id, None, 1, reader.id, db)
+    await get_user_posts(author.id, cursor, 1, reader.id, db)
+    # Export reads the whole table by design, so it is not checked.
+
+    await vote_post(VoteType.LIKE, reader.id, post.id, db)
+    await vote_posts(
+        [VoteIn(post_id=post.id, vote_type=VoteType.DISLIKE)], reader.id, db
+    )
+
+    await follow_user(reader.id, author.id, db)
+    _, cursor = await get_timeline(None, 1, reader.id, db)
+    await get_timeline(cursor, 1, reader.id, db)
+    await unfollow_user(reader.id, author.id, db)
+
+    await update_post(post.id, PostIn(content="explained"), author.id, db)
+
+    imported = {"username": uuid4().hex, "password_hash": pass_context.hash(password)}
+    for kind, record in (
+        (ImportKind.USERS, imported),
+        (ImportKind.POSTS, {"username": author.username, "content": "imported"}),
+        (
+            ImportKind.VOTES,
+            {"username": imported["username"], "post_id": post.id, "vote_type": "like"},
+        ),
+    ):
+        await import_records(kind, [json.dumps(record)], ImportFormat.NDJSON, db)
+
+    await delete_post(post.id, author.id, db)
+    await delete_user(reader.id, db)
+    await delete_user(author.id, db)
+
+
+def iter_plan(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from iter_plan(child)
+
+
+async def explain(min_rows: int) -> int:
+    """
+    Prints queries which scan tables of 'min_rows' rows or more sequentially
+    and returns number of them.
+
+    Endpoints run in a transaction which is rolled back at the end. Table
+    sizes are planner estimates, so run 'ANALYZE' on freshly seeded database.
+    """
+    statements: list[tuple[str, Any]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(EXPLAINABLE) and not executemany:
+            statements.append((statement, parameters))
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        db = AsyncSession(
+            bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False
+        )
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+        try:
+            await run_endpoints(db)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+        res = await conn.execute(
+            text("SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'")
+        )
+        table_rows = dict(res.tuples().all())
+
+        offending = 0
+        queries = dict(statements)
+        for statement, parameters in queries.items():
+            res = await conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters
+            )
+            plan = res.scalar()[0]["Plan"]
+            scans = [
+                node["Relation Name"]
+                for node in iter_plan(plan)
+                if node["Node Type"] == "Seq Scan"
+                and table_rows.get(node["Relation Name"], 0) >= min_rows
+            ]
+            if scans:
+                offending += 1
+                print(f"Sequential scan of {', '.join(scans)}:\n{statement}\n")
+
+        await transaction.rollback()
+
+    await engine.dispose()
+    print(f"Checked {len(queries)} queries, {offending} scan big tables.")
+    return offending
+
+
+if __name__ == "__main__":
+    args = arg_parser.parse_args()
+    raise SystemExit(1 if asyncio.run(explain(args.min_rows)) else 0)
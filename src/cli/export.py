@@ -0,0 +1,42 @@
+import asyncio
+import sys
+from argparse import ArgumentParser
+from datetime import datetime
+
+from src.db.session import async_session, engine
+from src.api.posts.core import export_posts
+
+
+arg_parser = ArgumentParser(
+    description=(
+        "Writes all posts with their vote counts as NDJSON, one post per line. "
+        "Same as 'GET /posts/export'."
+    )
+)
+arg_parser.add_argument(
+    "--since",
+    dest="since",
+    type=datetime.fromisoformat,
+    default=None,
+    help="Only posts edited or voted for at this time or later, ISO 8601.",
+)
+arg_parser.add_argument(
+    "--output", dest="output", default=None, help="File, stdout by default."
+)
+
+
+async def export(since: datetime | None, output: str | None) -> None:
+    file = open(output, "wb") if output else sys.stdout.buffer
+    try:
+        async with async_session() as db:
+            async for chunk in export_posts(since, db):
+                file.write(chunk)
+    finally:
+        if output:
+            file.close()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = arg_parser.parse_args()
+    asyncio.run(export(args.since, args.output))
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import random
+import subprocess
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from statistics import quantiles
+from time import perf_counter
+from typing import Any
+from uuid import uuid4
+
+import httpx
+
+
+arg_parser = ArgumentParser(
+    description=(
+        "Runs a mix of requests against running app and reports throughput and "
+        "latency percentiles per endpoint. Expects users made by 'src.cli.seed'."
+    )
+)
+arg_parser.add_argument("--url", dest="url", default="http://localhost:8080")
+arg_parser.add_argument(
+    "--duration", dest="duration", type=float, default=60, help="Seconds."
+)
+arg_parser.add_argument(
+    "--concurrency",
+    dest="concurrency",
+    type=int,
+    default=50,
+    help="Number of users making requests at the same time.",
+)
+arg_parser.add_argument("--prefix", dest="prefix", default="seed")
+arg_parser.add_argument("--password", dest="password", default="password")
+arg_parser.add_argument(
+    "--seeded-users",
+    dest="seeded_users",
+    type=int,
+    default=1000,
+    help="Users log in as one of the first that many seeded users.",
+)
+arg_parser.add_argument(
+    "--output", dest="output", required=True, help="JSON file for results."
+)
+arg_parser.add_argument("--random-seed", dest="random_seed", type=int, default=42)
+
+# Share of every endpoint in the mix.
+SCENARIOS = {
+    "mixed": {
+        "feed": 50,
+        "single": 20,
+        "vote": 20,
+        "edit": 5,
+        "login": 4,
+        "register": 1,
+    },
+    # Password hashing of many logins must not slow down everyone's reads.
+    "login-storm": {
+        "feed": 50,
+        "login": 50,
+    },
+}
+# Every user creates one post first, later only edits it.
+ENDPOINTS = list(
+    dict.fromkeys(["create", *(name for mix in SCENARIOS.values() for name in mix)])
+)
+
+arg_parser.add_argument(
+    "--scenario", dest="scenario", choices=list(SCENARIOS), default="mixed"
+)
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, args) -> None:
+        self.client = client
+        self.args = args
+        self.rnd = random.Random(args.random_seed)
+        self.scenario = SCENARIOS[args.scenario]
+        self.latencies: dict[str, list[float]] = {name: [] for name in ENDPOINTS}
+        self.errors: dict[str, int] = {name: 0 for name in ENDPOINTS}
+        self.post_ids: list[int] = []
+
+    async def request(self, name: str, method: str, url: str, **kwargs) -> Any:
+        """Makes request and records its latency, non 2xx responses are errors."""
+        start = perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.latencies[name].append(perf_counter() - start)
+
+        if response is None or not response.is_success:
+            self.errors[name] += 1
+            return None
+        return response
+
+    def pick_username(self) -> str:
+        return f"{self.args.prefix}{self.rnd.randrange(self.args.seeded_users)}"
+
+    async def login(self, username: str) -> dict[str, str] | None:
+        response = await self.request(
+            "login",
+            "POST",
+            "/auth/login",
+            data={"username": username, "password": self.args.password},
+        )
+        if response is None:
+            return None
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def user(self, deadline: float) -> None:
+        """Logs in, writes a post and makes requests from scenario until deadline."""
+        username = self.pick_username()
+        headers = await self.login(username)
+        if headers is None:
+            return
+        # Overloaded server may refuse, such user just does not take part.
+        response = await self.request(
+            "create", "POST", "/posts", json={"content": "load test"}, headers=headers
+        )
+        if response is None:
+            return
+        own_post_id = response.json()["id"]
+        cursor = None
+
+        names, weights = list(self.scenario), list(self.scenario.values())
+        while perf_counter() < deadline:
+            name = self.rnd.choices(names, weights)[0]
+            post_id = self.rnd.choice(self.post_ids or [own_post_id])
+
+            if name == "feed":
+                params = {"limit": 20, **({"cursor": cursor} if cursor else {})}
+                response = await self.request(
+                    "feed", "GET", "/posts", params=params, headers=headers
+                )
+                # Users scroll a few pages down, then start from the top.
+                if response is not None and self.rnd.random() < 0.3:
+                    cursor = response.headers.get("X-Next-Cursor")
+                else:
+                    cursor = None
+            elif name == "single":
+                await self.request(
+                    "single", "GET", f"/posts/{post_id}", headers=headers
+                )
+            elif name == "vote":
+                vote_type = self.rnd.choice(["like", "dislike"])
+                await self.request(
+                    "vote", "POST", f"/posts/{post_id}/{vote_type}", headers=headers
+                )
+            elif name == "edit":
+                await self.request(
+                    "edit",
+                    "PATCH",
+                    f"/posts/{own_post_id}",
+                    json={"content": f"load test {uuid4().hex}"},
+                    headers=headers,
+                )
+            elif name == "login":
+                headers = await self.login(username) or headers
+            elif name == "register":
+                await self.request(
+                    "register",
+                    "POST",
+                    "/auth/register",
+                    json={"username": uuid4().hex, "password": self.args.password},
+                )
+
+    async def run(self) -> float:
+        """Runs users for 'duration' seconds, returns actual duration."""
+        headers = await self.login(self.pick_username())
+        if headers is None:
+            raise SystemExit("Can't log in, seed database with 'src.cli.seed' first.")
+        response = await self.request(
+            "feed", "GET", "/posts", params={"limit": 100}, headers=headers
+        )
+        if response is None:
+            raise SystemExit("Can't read posts.")
+        self.post_ids = [post["id"] for post in response.json()]
+        self.latencies["login"].clear()
+        self.latencies["feed"].clear()
+
+        start = perf_counter()
+        deadline = start + self.args.duration
+        await asyncio.gather(
+            *(self.user(deadline) for _ in range(self.args.concurrency))
+        )
+        return perf_counter() - start
+
+    def report(self, seconds: float) -> dict[str, Any]:
+        endpoints = {}
+        for name, latencies in self.latencies.items():
+            if len(latencies) < 2:
+                continue
+            percentiles = quantiles(latencies, n=100)
+            endpoints[name] = {
+                "requests": len(latencies),
+                "errors": self.errors[name],
+                "rps": round(len(latencies) / seconds, 1),
+                "p50_ms": round(percentiles[49] * 1000, 1),
+                "p95_ms": round(percentiles[94] * 1000, 1),
+                "p99_ms": round(percentiles[98] * 1000, 1),
+            }
+        return endpoints
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def load_test(args) -> None:
+    started_at = datetime.now(timezone.utc)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.url, limits=limits, timeout=30
+    ) as client:
+        test = LoadTest(client, args)
+        seconds = await test.run()
+
+    endpoints = test.report(seconds)
+    print(
+        f"{'endpoint':10} {'requests':>9} {'errors':>7} {'rps':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for name, stats in endpoints.items():
+        print(
+            f"{name:10} {stats['requests']:>9} {stats['errors']:>7} "
+            f"{stats['rps']:>8} {stats['p50_ms']:>8} {stats['p95_ms']:>8} "
+            f"{stats['p99_ms']:>8}"
+        )
+
+    with open(args.output, "w") as file:
+        json.dump(
+            {
+                "commit": current_commit(),
+                "started_at": started_at.isoformat(),
+                "seconds": round(seconds, 1),
+                "args": vars(args),
+                "endpoints": endpoints,
+            },
+            file,
+            indent=2,
+        )
+    print(f"Saved results to {args.output}.")
+
+
+if __name__ == "__main__":
+    asyncio.run(load_test(arg_parser.parse_args()))
@@ -0,0 +1,59 @@
+import asyncio
+from argparse import ArgumentParser
+
+from src.db.session import async_session, engine
+from src.api.posts.utils import get_vote_count_drift, repair_vote_count_drift
+from src.api.users.utils import get_user_count_drift, repair_user_count_drift
+
+
+arg_parser = ArgumentParser(
+    description=(
+        "Checks posts' vote counters and users' post and follower counters "
+        "against the counted rows and repairs drift."
+    )
+)
+arg_parser.add_argument(
+    "--fix", dest="fix", action="store_true", help="Repair drifted counters."
+)
+
+
+async def reconcile(fix: bool) -> int:
+    """
+    Prints drifted posts and users, repairs them if 'fix' and returns
+    number of them.
+    """
+    async with async_session() as db:
+        drift = await get_vote_count_drift(db)
+
+        for post_id, like_count, dislike_count, likes, dislikes in drift:
+            print(
+                f"post {post_id}: likes {like_count} -> {likes}, "
+                f"dislikes {dislike_count} -> {dislikes}"
+            )
+
+        if fix and drift:
+            repaired = await repair_vote_count_drift(db)
+            await db.commit()
+            print(f"Repaired {repaired} posts.")
+
+        user_drift = await get_user_count_drift(db)
+
+        for user_id, post_count, follower_count, posts, followers in user_drift:
+            print(
+                f"user {user_id}: posts {post_count} -> {posts}, "
+                f"followers {follower_count} -> {followers}"
+            )
+
+        if fix and user_drift:
+            repaired = await repair_user_count_drift(db)
+            await db.commit()
+            print(f"Repaired {repaired} users.")
+
+    await engine.dispose()
+    return len(drift) + len(user_drift)
+
+
+if __name__ == "__main__":
+    args = arg_parser.parse_args()
+    drifted = asyncio.run(reconcile(args.fix))
+    raise SystemExit(1 if drifted and not args.fix else 0)
@@ -0,0 +1,244 @@
+import asyncio
+import random
+from argparse import ArgumentParser
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from time import perf_counter
+from typing import Callable, Iterator
+
+import asyncpg
+from passlib.context import CryptContext
+
+from src.settings import settings
+
+
+arg_parser = ArgumentParser(
+    description=(
+        "Fills database with generated users, posts, follows and votes. "
+        "Authors, followed users and voted posts follow power law, "
+        "like on real social networks."
+    )
+)
+arg_parser.add_argument("--users", dest="users", type=int, default=100_000)
+arg_parser.add_argument("--posts", dest="posts", type=int, default=1_000_000)
+arg_parser.add_argument("--follows", dest="follows", type=int, default=1_000_000)
+arg_parser.add_argument("--votes", dest="votes", type=int, default=5_000_000)
+arg_parser.add_argument(
+    "--skew",
+    dest="skew",
+    type=float,
+    default=1.1,
+    help="Power law exponent, the higher the more skewed.",
+)
+arg_parser.add_argument(
+    "--days", dest="days", type=int, default=365, help="Posts are spread over days."
+)
+arg_parser.add_argument(
+    "--prefix",
+    dest="prefix",
+    default="seed",
+    help="Usernames are prefix and number, e.g. 'seed42'.",
+)
+arg_parser.add_argument(
+    "--password", dest="password", default="password", help="Password of all users."
+)
+arg_parser.add_argument(
+    "--timeline-posts",
+    dest="timeline_posts",
+    type=int,
+    default=10,
+    help="Latest posts of every followed user put into follower's timeline.",
+)
+arg_parser.add_argument("--random-seed", dest="random_seed", type=int, default=42)
+
+BATCH_SIZE = 100_000
+WORDS = (
+    "hello world today news photo friends music game coffee city weather "
+    "travel sport movie book code cat dog food love work weekend"
+).split()
+
+
+class PowerLaw:
+    """Picks ids from 'ids', the first ones far more often than the last ones."""
+
+    def __init__(self, ids: list[int], skew: float, rnd: random.Random) -> None:
+        self.ids = ids
+        self.rnd = rnd
+        self.weights = list(
+            accumulate(1 / rank**skew for rank in range(1, len(ids) + 1))
+        )
+
+    def pick(self) -> int:
+        point = self.rnd.random() * self.weights[-1]
+        return self.ids[bisect_left(self.weights, point)]
+
+
+async def reserve_ids(conn: asyncpg.Connection, table: str, count: int) -> list[int]:
+    """Takes 'count' ids from table's sequence, so rows can be copied with them."""
+    start = await conn.fetchval(f"SELECT nextval('{table}_id_seq')")
+    await conn.execute(f"SELECT setval('{table}_id_seq', {start + count - 1})")
+    return list(range(start, start + count))
+
+
+async def copy(
+    conn: asyncpg.Connection, table: str, columns: list[str], records: Iterator
+) -> None:
+    """Copies 'records' into 'table' in batches."""
+    start = perf_counter()
+    total = 0
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == BATCH_SIZE:
+            await conn.copy_records_to_table(table, records=batch, columns=columns)
+            total += len(batch)
+            batch = []
+    if batch:
+        await conn.copy_records_to_table(table, records=batch, columns=columns)
+        total += len(batch)
+    print(f"Copied {total} rows to {table} in {perf_counter() - start:.1f}s.")
+
+
+def unique_pairs(
+    count: int, pair: Callable[[], tuple | None], attempts: int = 3
+) -> Iterator:
+    """Yields up to 'count' distinct pairs made by 'pair', skipping Nones."""
+    seen = set()
+    for _ in range(count * attempts):
+        if len(seen) == count:
+            return
+        made = pair()
+        if made is None or made[:2] in seen:
+            continue
+        seen.add(made[:2])
+        yield made
+
+
+async def seed(args) -> None:
+    rnd = random.Random(args.random_seed)
+    conn = await asyncpg.connect(
+        host=settings.postgres_host,
+        port=int(settings.postgres_port),
+        user=settings.postgres_user,
+        password=settings.postgres_password,
+        database=settings.postgres_database_name,
+    )
+    now = datetime.now(timezone.utc)
+
+    # All users share one hash, hashing millions of passwords takes hours.
+    password = CryptContext(["bcrypt"]).hash(args.password)
+    user_ids = await reserve_ids(conn, "users", args.users)
+    await copy(
+        conn,
+        "users",
+        ["id", "username", "password", "created_at"],
+        (
+            (user_id, f"{args.prefix}{number}", password, now - timedelta(args.days))
+            for number, user_id in enumerate(user_ids)
+        ),
+    )
+
+    # Popularity of users does not depend on their ids.
+    popular_users = PowerLaw(rnd.sample(user_ids, len(user_ids)), args.skew, rnd)
+    post_ids = await reserve_ids(conn, "posts", args.posts)
+    owners = {}
+    created = sorted(rnd.random() for _ in post_ids)
+
+    def posts() -> Iterator:
+        for post_id, offset in zip(post_ids, created):
+            owners[post_id] = owner_id = popular_users.pick()
+            created_at = now - timedelta(args.days * (1 - offset))
+            content = " ".join(rnd.choices(WORDS, k=rnd.randint(3, 30)))
+            yield post_id, content, owner_id, created_at, created_at
+
+    await copy(
+        conn,
+        "posts",
+        ["id", "content", "owner_id", "created_at", "updated_at"],
+        posts(),
+    )
+
+    def follow() -> tuple[int, int] | None:
+        follower_id, followee_id = rnd.choice(user_ids), popular_users.pick()
+        if follower_id != followee_id:
+            return follower_id, followee_id
+
+    await copy(
+        conn,
+        "follows",
+        ["follower_id", "followee_id"],
+        unique_pairs(args.follows, follow),
+    )
+
+    # Recent posts get more votes.
+    popular_posts = PowerLaw(post_ids[::-1], args.skew, rnd)
+
+    def vote() -> tuple[int, int, str] | None:
+        post_id, user_id = popular_posts.pick(), rnd.choice(user_ids)
+        if owners[post_id] != user_id:
+            return post_id, user_id, "LIKE" if rnd.random() < 0.8 else "DISLIKE"
+
+    await copy(
+        conn,
+        "votes",
+        ["post_id", "user_id", "vote_type"],
+        unique_pairs(args.votes, vote),
+    )
+
+    start = perf_counter()
+    async with conn.transaction():
+        await conn.execute(
+            "UPDATE posts SET like_count = counts.likes, "
+            "dislike_count = counts.dislikes FROM ("
+            "SELECT post_id, count(*) FILTER (WHERE vote_type = 'LIKE') AS likes, "
+            "count(*) FILTER (WHERE vote_type = 'DISLIKE') AS dislikes "
+            "FROM votes WHERE post_id = ANY($1) GROUP BY post_id) AS counts "
+            "WHERE counts.post_id = posts.id",
+            post_ids,
+        )
+        await conn.execute(
+            "UPDATE users SET post_count = counts.posts FROM ("
+            "SELECT owner_id, count(*) AS posts FROM posts "
+            "WHERE owner_id = ANY($1) GROUP BY owner_id) AS counts "
+            "WHERE counts.owner_id = users.id",
+            user_ids,
+        )
+        await conn.execute(
+            "UPDATE users SET follower_count = counts.followers FROM ("
+            "SELECT followee_id, count(*) AS followers FROM follows "
+            "WHERE followee_id = ANY($1) GROUP BY followee_id) AS counts "
+            "WHERE counts.followee_id = users.id",
+            user_ids,
+        )
+        # Timelines as if everyone followed before posting, latest posts only.
+        await conn.execute(
+            "INSERT INTO timeline_entries (user_id, post_id, created_at) "
+            "SELECT audience.user_id, recent.id, recent.created_at FROM ("
+            "SELECT id, owner_id, created_at, row_number() OVER "
+            "(PARTITION BY owner_id ORDER BY created_at DESC) AS number "
+            "FROM posts WHERE owner_id = ANY($1)) AS recent "
+            "JOIN users ON users.id = recent.owner_id "
+            "CROSS JOIN LATERAL ("
+            "SELECT recent.owner_id AS user_id UNION ALL "
+            "SELECT follower_id FROM follows WHERE followee_id = recent.owner_id "
+            "AND users.follower_count <= $2) AS audience "
+            "WHERE recent.number <= $3 "
+            "ON CONFLICT DO NOTHING",
+            user_ids,
+            settings.timeline_fanout_max_followers,
+            args.timeline_posts,
+        )
+        await conn.execute(
+            "UPDATE users SET fanout_skipped = true "
+            "WHERE id = ANY($1) AND follower_count > $2",
+            user_ids,
+            settings.timeline_fanout_max_followers,
+        )
+    await conn.execute("ANALYZE")
+    print(f"Counted and analyzed in {perf_counter() - start:.1f}s.")
+    await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(seed(arg_parser.parse_args()))
@@ -1,15 +1,47 @@
 from fastapi import FastAPI
+from loguru import logger
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 from src.api.auth.views import auth_router
+from src.api.events.hub import event_hub
+from src.api.events.views import events_router
+from src.api.imports.views import imports_router
+from src.api.monitoring.views import metrics_router, monitoring_router
+from src.api.posts.buffer import vote_buffer
 from src.api.posts.views import posts_router
+from src.api.users.views import users_router
+from src.db.replicas import replica_router
+from src.db.session import engine, pool_timeout_handler
+from src.log import RequestIdMiddleware, setup_logging
+from src.metrics import MetricsMiddleware
 
 
-app = FastAPI(
-    title="Simple social network",
-)
+def create_app() -> FastAPI:
+    """Builds new application instance."""
+    setup_logging()
+    app = FastAPI(
+        title="Simple social network",
+        default_response_class=ORJSONResponse,
+    )
 
-
-def create_app():
     app.include_router(auth_router)
     app.include_router(posts_router)
+    app.include_router(users_router)
+    app.include_router(imports_router)
+    app.include_router(events_router)
+    app.include_router(monitoring_router)
+    app.include_router(metrics_router)
+    app.add_middleware(MetricsMiddleware)
+    # Added last to run first, so everything logged during request has its id.
+    app.add_middleware(RequestIdMiddleware)
+    app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
+    app.add_event_handler("startup", replica_router.start)
+    app.add_event_handler("startup", vote_buffer.start)
+    app.add_event_handler("startup", event_hub.start)
+    app.add_event_handler("shutdown", event_hub.stop)
+    app.add_event_handler("shutdown", vote_buffer.stop)
+    app.add_event_handler("shutdown", replica_router.stop)
+    app.add_event_handler("shutdown", engine.dispose)
+    app.add_event_handler("shutdown", logger.complete)
     return app
@@ -0,0 +1,215 @@
+import asyncio
+from itertools import count
+from math import ceil
+from time import time
+from typing import Any, AsyncGenerator
+
+from fastapi import Cookie, Depends, Response
+from loguru import logger
+from sqlalchemy import event, text
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from src.db.session import (
+    async_session,
+    create_engine,
+    get_database_url,
+    get_pool_stats,
+    get_session,
+)
+from src.oauth2.core import get_current_user
+from src.settings import settings
+
+
+# Zero when replica has replayed everything it received, so idle primary
+# does not make replica look lagging.
+LAG_QUERY = text(
+    "SELECT CASE "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE coalesce("
+    "extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END"
+)
+
+
+# Time until which client's reads go to primary, set when it writes.
+PRIMARY_COOKIE = "read_primary_until"
+
+
+class Replica:
+    """
+    Read-only database with its own pool.
+
+    'healthy' is None until the first check. Sessions on replica have its
+    name in 'info'.
+    """
+
+    def __init__(self, host: str, port: str) -> None:
+        self.name = f"{host}:{port}"
+        self.engine = create_engine(get_database_url(host, port))
+        self.session = sessionmaker(
+            self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            info={"replica": self.name},
+        )
+        self.healthy: bool | None = None
+        self.lag_seconds = 0.0
+
+        event.listen(self.engine.sync_engine, "handle_error", self.on_error)
+
+    def on_error(self, context: ExceptionContext) -> None:
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(context.original_exception)
+
+    def mark_down(self, reason: Any) -> None:
+        if self.healthy is not False:
+            logger.warning(f"Replica {self.name} is down: {reason}")
+        self.healthy = False
+
+    async def check(self) -> None:
+        """Measures replication lag and updates health state."""
+        try:
+            async with self.engine.connect() as conn:
+                self.lag_seconds = float(await conn.scalar(LAG_QUERY))
+        except Exception as e:
+            self.mark_down(e)
+            return
+
+        if self.lag_seconds > settings.db_replica_max_lag_seconds:
+            self.mark_down(f"lag {self.lag_seconds:.1f}s")
+            return
+
+        if self.healthy is not True:
+            logger.info(f"Replica {self.name} is up.")
+        self.healthy = True
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            **get_pool_stats(self.engine),
+        }
+
+
+class ReplicaRouter:
+    """
+    Chooses replica for reads.
+
+    Unhealthy replicas are skipped, if there is no healthy one reads go to
+    primary. Users who wrote recently read from primary for
+    'db_read_your_writes_seconds', so they always see their own writes.
+    """
+
+    def __init__(self, hosts: list[str]) -> None:
+        self.replicas = [Replica(*host.rsplit(":", 1)) for host in hosts]
+        self.turns = count()
+        self.writers: dict[int, float] = {}
+        self.checks: asyncio.Task | None = None
+
+    def stick_to_primary(self, user_id: int, response: Response) -> None:
+        """
+        Sends user's reads to primary for 'db_read_your_writes_seconds'.
+
+        Other workers don't know about it, so the client gets the time in
+        'PRIMARY_COOKIE' too, and its reads stick to primary on any worker.
+        """
+        now = time()
+        until = now + settings.db_read_your_writes_seconds
+        if len(self.writers) > 10_000:
+            self.writers = {
+                writer: until for writer, until in self.writers.items() if until > now
+            }
+        self.writers[user_id] = until
+
+        if self.replicas:
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                f"{until:.3f}",
+                max_age=ceil(settings.db_read_your_writes_seconds),
+                httponly=True,
+                samesite="lax",
+            )
+
+    def choose(self, user_id: int, primary_until: float = 0) -> Replica | None:
+        """
+        Replica for user's reads, None for primary.
+
+        'primary_until' comes from client's cookie, values further than
+        'db_read_your_writes_seconds' ahead were not set by us and are ignored.
+        A second of leeway covers rounding of the cookie and workers' clocks.
+        """
+        now = time()
+        if self.writers.get(user_id, 0) > now:
+            return None
+        if now < primary_until <= now + settings.db_read_your_writes_seconds + 1:
+            return None
+
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+
+        if settings.db_replica_selection == "least_connections":
+            return min(
+                healthy,
+                key=lambda replica: replica.engine.sync_engine.pool.checkedout(),
+            )
+        return healthy[next(self.turns) % len(healthy)]
+
+    async def check(self) -> None:
+        await asyncio.gather(*(replica.check() for replica in self.replicas))
+
+    async def run_checks(self) -> None:
+        while True:
+            await asyncio.sleep(settings.db_replica_check_interval_seconds)
+            await self.check()
+
+    async def start(self) -> None:
+        """Checks replicas once, then keeps checking them in background."""
+        if self.replicas:
+            await self.check()
+            self.checks = asyncio.create_task(self.run_checks())
+
+    async def stop(self) -> None:
+        if self.checks:
+            self.checks.cancel()
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+replica_router = ReplicaRouter(settings.postgres_replica_hosts)
+
+
+def primary_until(read_primary_until: str | None = Cookie(None)) -> float:
+    """Time from client's 'PRIMARY_COOKIE', 0 if it is absent or malformed."""
+    try:
+        return float(read_primary_until or 0)
+    except ValueError:
+        return 0
+
+
+def read_sessionmaker(user_id: int, primary_until: float = 0) -> sessionmaker:
+    """
+    Sessions on a replica if there is a suitable one, on primary otherwise.
+
+    For reads outliving the request's dependencies, like streamed responses.
+    """
+    replica = replica_router.choose(user_id, primary_until)
+    return async_session if replica is None else replica.session
+
+
+async def get_read_session(
+    user_id: int = Depends(get_current_user),
+    until: float = Depends(primary_until),
+    db: AsyncSession = Depends(get_session),
+) -> AsyncGenerator[Any, AsyncSession]:
+    """Session on a replica if there is a suitable one, primary session otherwise."""
+    replica = replica_router.choose(user_id, until)
+    if replica is None:
+        yield db
+        return
+
+    async with replica.session() as session:
+        yield session
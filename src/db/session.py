@@ -1,19 +1,79 @@
+from time import perf_counter
 from typing import Any, AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from src.metrics import instrument_engine
 from src.settings import settings
 
 
-DATABASE_URL = (
-    f"postgresql+asyncpg://{settings.postgres_user}:"
-    f"{settings.postgres_password}"
-    f"@{settings.postgres_host}:"
-    f"{settings.postgres_port}/{settings.postgres_database_name}"
-)
+def get_database_url(host: str, port: str) -> str:
+    return (
+        f"postgresql+asyncpg://{settings.postgres_user}:"
+        f"{settings.postgres_password}"
+        f"@{host}:{port}/{settings.postgres_database_name}"
+    )
+
+
+DATABASE_URL = get_database_url(settings.postgres_host, settings.postgres_port)
+
+
+class MonitoredPool(AsyncAdaptedQueuePool):
+    """Connection pool which keeps track of waiting for a free connection."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+
+    def connect(self):
+        start = perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waits += 1
+            self.wait_seconds += perf_counter() - start
+
+
+def get_connect_args() -> dict[str, Any]:
+    """Builds asyncpg connection arguments from settings."""
+    server_settings = {}
+    if settings.db_statement_timeout_ms:
+        server_settings["statement_timeout"] = str(settings.db_statement_timeout_ms)
+
+    return {
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+        "server_settings": server_settings,
+    }
 
 
-engine = create_async_engine(DATABASE_URL)
+def create_engine(url: str) -> AsyncEngine:
+    """Creates engine with pool tuned by settings and statements measured."""
+    engine = create_async_engine(
+        url,
+        poolclass=MonitoredPool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_pool_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=get_connect_args(),
+    )
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+engine = create_engine(DATABASE_URL)
 async_session = sessionmaker(
     engine,
     class_=AsyncSession,
@@ -23,5 +83,45 @@ Base = declarative_base()
 
 
 async def get_session() -> AsyncGenerator[Any, AsyncSession]:
+    """
+    Session for a request.
+
+    It takes a connection from pool on the first statement only, so requests
+    which fail auth or are served from cache do not take one at all.
+    """
     async with async_session() as session:
         yield session
+
+
+async def release_connection(db: AsyncSession) -> None:
+    """
+    Ends session's transaction after reads, so its connection goes back to pool
+    right away instead of after the response is sent.
+
+    Session stays usable and takes a connection again on the next statement.
+    Commit is used, as rollback would expire loaded objects.
+    """
+    await db.commit()
+
+
+def get_pool_stats(engine: AsyncEngine = engine) -> dict[str, int | float]:
+    """Returns current state and wait statistics of engine's connection pool."""
+    pool: MonitoredPool = engine.sync_engine.pool  # type: ignore
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "waits": pool.waits,
+        "wait_seconds": pool.wait_seconds,
+        "timeouts": pool.timeouts,
+    }
+
+
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    """Answers 503 when no connection got free within 'db_pool_timeout_seconds'."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, try again later."},
+        headers={"Retry-After": "1"},
+    )
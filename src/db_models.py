@@ -1,13 +1,19 @@
 from sqlalchemy import (
+    Boolean,
     Column,
+    Computed,
+    Double,
     Enum,
     ForeignKey,
     func,
+    Index,
     Integer,
     String,
     TIMESTAMP,
+    text,
 )
-from sqlalchemy.orm import Mapped, relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Mapped, deferred, relationship
 
 from src.utils_classes import VoteType
 from src.db.session import Base
@@ -22,6 +28,12 @@ class User(Base):
     created_at = Column(
         TIMESTAMP(timezone=True), nullable=False, server_default=func.now()
     )
+    follower_count = Column(Integer, nullable=False, default=0, server_default="0")
+    post_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Set once any post of the user was not fanned out to followers.
+    fanout_skipped = Column(
+        Boolean, nullable=False, default=False, server_default=text("false")
+    )
 
     posts: Mapped[list["Post"]] = relationship(back_populates="owner")  # type: ignore
 
@@ -40,9 +52,37 @@ class Post(Base):
     owner_id = Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    dislike_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_voted_at = Column(TIMESTAMP(timezone=True))
+
+    content_tsv = deferred(
+        Column(
+            TSVECTOR,
+            Computed("to_tsvector('english', content)", persisted=True),
+        )
+    )
+    # Recomputed by database whenever vote counters change.
+    hot_score = deferred(
+        Column(
+            Double,
+            Computed(
+                "hot_score(like_count, dislike_count, created_at)", persisted=True
+            ),
+        )
+    )
+
+    __table_args__ = (
+        Index("ix_posts_created_at_id", created_at.desc(), id.desc()),
+        Index("ix_posts_owner_id_created_at", owner_id, created_at.desc(), id.desc()),
+        Index("ix_posts_content_tsv", "content_tsv", postgresql_using="gin"),
+        Index("ix_posts_hot_score", text("hot_score DESC"), id.desc()),
+        # Trigram index on 'content' is not declared, migration makes it only
+        # where 'pg_trgm' extension is available.
+    )
 
     owner: Mapped["User"] = relationship()  # type: ignore
-    votes: Mapped[list["Vote"]] = relationship()  # type: ignore
+    votes: Mapped[list["Vote"]] = relationship(passive_deletes=True)  # type: ignore
 
 
 class Vote(Base):
@@ -63,3 +103,64 @@ class Vote(Base):
     )
 
     vote_type = Column(Enum(VoteType), nullable=False)
+
+    __table_args__ = (
+        Index("ix_votes_post_id_vote_type", post_id, vote_type),
+        Index("ix_votes_user_id", user_id),
+    )
+
+
+class Follow(Base):
+    __tablename__ = "follows"
+
+    follower_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        primary_key=True,
+    )
+
+    followee_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        primary_key=True,
+    )
+
+    created_at = Column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    __table_args__ = (Index("ix_follows_followee_id", followee_id),)
+
+
+class TimelineEntry(Base):
+    """Post delivered to user's home timeline, 'created_at' is copied from post."""
+
+    __tablename__ = "timeline_entries"
+
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        primary_key=True,
+    )
+
+    post_id = Column(
+        Integer,
+        ForeignKey("posts.id", ondelete="CASCADE"),
+        nullable=False,
+        primary_key=True,
+    )
+
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index(
+            "ix_timeline_entries_user_id_created_at",
+            user_id,
+            created_at.desc(),
+            post_id.desc(),
+        ),
+        Index("ix_timeline_entries_post_id", post_id),
+    )
@@ -0,0 +1,71 @@
+import random
+import sys
+from contextvars import ContextVar
+from typing import Any
+from uuid import uuid4
+
+from loguru import logger
+
+from src.settings import settings
+
+
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+
+def add_request_id(record: dict[str, Any]) -> None:
+    record["extra"]["request_id"] = request_id.get()
+
+
+def sample(record: dict[str, Any]) -> bool:
+    """Lets through 'log_info_sample_rate' of info and lower level records."""
+    if record["level"].no > logger.level("INFO").no:
+        return True
+    return random.random() < settings.log_info_sample_rate
+
+
+def setup_logging() -> None:
+    """
+    Sends logs to stderr from a background thread, so logging never blocks
+    event loop. Records carry id of the request they were made in.
+    """
+    logger.remove()
+    logger.configure(patcher=add_request_id)
+    logger.add(
+        sys.stderr,
+        level=settings.log_level,
+        serialize=settings.log_json,
+        filter=sample,
+        enqueue=True,
+    )
+
+
+class RequestIdMiddleware:
+    """
+    Gives every request an id, taken from 'X-Request-ID' header if client
+    sent one, and returns it in the same response header.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        value = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid4().hex
+        token = request_id.set(value)
+
+        async def send_with_id(message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-request-id", value.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
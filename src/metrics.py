@@ -0,0 +1,241 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Iterable
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.settings import settings
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Metric(ABC):
+    """Base of metrics kept in process memory and rendered for Prometheus."""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        registry.append(self)
+
+    def format_labels(self, values: tuple[str, ...], **extra: str) -> str:
+        pairs = [*zip(self.labels, values), *extra.items()]
+        if not pairs:
+            return ""
+        escaped = (
+            (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+            for name, value in pairs
+        )
+        return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        """Lines of the metric's values in Prometheus text format."""
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.help}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(f"{sample}\n" for sample in self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}{self.format_labels(labels)} {value}"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # Per labels: count of observations in every bucket (and over the
+        # last one), sum of observed values.
+        self.values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts, total = self.values.setdefault(
+            labels, ([0] * (len(self.buckets) + 1), [0.0])
+        )
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                bucket_labels = self.format_labels(labels, le=str(bound))
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{self.format_labels(labels)} {total[0]}"
+            yield f"{self.name}_count{self.format_labels(labels)} {cumulative}"
+
+
+registry: list[Metric] = []
+
+requests_total = Counter(
+    "http_requests_total", "Requests handled.", ("method", "route", "status")
+)
+request_seconds = Histogram(
+    "http_request_duration_seconds", "Request latency.", ("method", "route")
+)
+response_bytes = Histogram(
+    "http_response_size_bytes",
+    "Response body size.",
+    ("method", "route"),
+    SIZE_BUCKETS,
+)
+request_statements = Histogram(
+    "db_statements_per_request",
+    "Database statements issued by a request.",
+    ("method", "route"),
+    COUNT_BUCKETS,
+)
+request_db_seconds = Histogram(
+    "db_seconds_per_request",
+    "Time a request spent in database statements.",
+    ("method", "route"),
+)
+password_hash_seconds = Histogram(
+    "password_hash_seconds", "Time of hashing or verifying a password."
+)
+
+
+def render() -> str:
+    """All metrics in Prometheus text format."""
+    return "".join(metric.render() for metric in registry)
+
+
+class RequestStats:
+    """Work done by one request, filled in by engine events and hashing."""
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.sql: list[str] = []
+
+
+request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    context.metrics_start = perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    elapsed = perf_counter() - context.metrics_start
+    stats = request_stats.get()
+    if stats is None:
+        return
+
+    stats.statements += 1
+    stats.db_seconds += elapsed
+    # Enough to spot N+1 queries, bounded for requests issuing thousands.
+    if len(stats.sql) < 100:
+        stats.sql.append(statement)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Makes statements executed by 'engine' count towards request stats."""
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def observe_password_hash(seconds: float) -> None:
+    password_hash_seconds.observe(seconds)
+    stats = request_stats.get()
+    if stats is not None:
+        stats.hash_seconds += seconds
+
+
+class MetricsMiddleware:
+    """
+    Records latency, response size and database work of every request.
+
+    Requests are labeled by route path, so '/posts/1' and '/posts/2' are
+    one route. Requests slower than 'slow_request_seconds' are logged with
+    the SQL they issued.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+        self.routes: dict[Any, str] = {}
+
+    def route_of(self, scope: dict[str, Any]) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if not self.routes:
+            self.routes = {
+                route.endpoint: route.path
+                for route in scope["app"].routes
+                if hasattr(route, "endpoint")
+            }
+        return self.routes.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        status_code = 500
+        size = 0
+
+        async def send_with_stats(message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            elapsed = perf_counter() - start
+            request_stats.reset(token)
+
+            method, route = scope["method"], self.route_of(scope)
+            requests_total.inc(method, route, str(status_code))
+            request_seconds.observe(elapsed, method, route)
+            response_bytes.observe(size, method, route)
+            request_statements.observe(stats.statements, method, route)
+            request_db_seconds.observe(stats.db_seconds, method, route)
+
+            if elapsed >= settings.slow_request_seconds:
+                sql = "\n".join(stats.sql)
+                logger.warning(
+                    f"Slow request {method} {scope['path']}: {elapsed:.3f}s, "
+                    f"{stats.statements} statements in {stats.db_seconds:.3f}s, "
+                    f"password hashing {stats.hash_seconds:.3f}s.\n{sql}"
+                )
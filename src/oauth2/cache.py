@@ -0,0 +1,59 @@
+from collections import OrderedDict
+from time import monotonic
+
+from src.settings import settings
+
+
+KNOWN_USER_PREFIX = "known_user:"
+
+
+def known_user_key(user_id: int) -> str:
+    return f"{KNOWN_USER_PREFIX}{user_id}"
+
+
+class KnownUsersCache:
+    """
+    In-process cache of ids of users confirmed to exist in DB.
+
+    Entries expire after 'ttl' seconds, least recently added entries are
+    evicted when cache grows over 'max_size'. Each worker process has its
+    own cache, users deleted via any worker are dropped from all of them
+    through 'known_user_key' invalidations.
+    """
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._expires_at: OrderedDict[int, float] = OrderedDict()
+
+    def __contains__(self, user_id: int) -> bool:
+        expires_at = self._expires_at.get(user_id)
+        if expires_at is None:
+            return False
+        if expires_at < monotonic():
+            del self._expires_at[user_id]
+            return False
+        return True
+
+    def add(self, user_id: int) -> None:
+        self._expires_at[user_id] = monotonic() + self.ttl
+        self._expires_at.move_to_end(user_id)
+        while len(self._expires_at) > self.max_size:
+            self._expires_at.popitem(last=False)
+
+    def discard(self, user_id: int) -> None:
+        self._expires_at.pop(user_id, None)
+
+    def invalidate(self, *keys: str) -> None:
+        """Drops users of 'known_user_key' keys, other keys are ignored."""
+        for key in keys:
+            if key.startswith(KNOWN_USER_PREFIX):
+                self.discard(int(key.removeprefix(KNOWN_USER_PREFIX)))
+
+    def clear(self) -> None:
+        self._expires_at.clear()
+
+
+known_users = KnownUsersCache(
+    settings.auth_user_cache_ttl_seconds, settings.auth_user_cache_size
+)
@@ -8,7 +8,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.settings import settings
 from src.db_models import User
-from src.db.session import get_session
+from src.db.session import get_session, release_connection
+from src.oauth2.cache import known_users
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -41,7 +42,12 @@ def get_id_from_access_token(token: str, credentials_exception) -> int:
 async def get_current_user(
     token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_session)
 ) -> int:
-    """Verifys user's access token, checks if user in db and returns user_id."""
+    """
+    Verifys user's access token, checks if user in db and returns user_id.
+
+    With 'auth_user_check' set to 'cached' users found in db are remembered
+    for a while and are not looked up again.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -49,11 +55,15 @@ async def get_current_user(
     )
 
     user_id = get_id_from_access_token(token, credentials_exception)
+    if settings.auth_user_check == "cached" and user_id in known_users:
+        return user_id
 
     query = select(User).where(User.id == user_id)
     res = await db.execute(query)
     user = res.scalars().first()
+    await release_connection(db)
     if not user:
         raise credentials_exception
 
+    known_users.add(user_id)
     return user_id
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,10 +9,51 @@ class Settings(BaseSettings):
     postgres_user: str = "postgres"
     postgres_password: str = "postgres"
     postgres_database_name: str = "postgres"
+    postgres_replica_hosts: list[str] = []
+
+    db_pool_size: int = 5
+    db_pool_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 5
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 0
+    db_statement_cache_size: int = 100
+    db_replica_selection: Literal["round_robin", "least_connections"] = "round_robin"
+    db_replica_max_lag_seconds: float = 5
+    db_replica_check_interval_seconds: float = 5
+    db_read_your_writes_seconds: float = 5
 
     secret: str = "secret"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 5
+    auth_user_check: Literal["strict", "cached"] = "strict"
+    auth_user_cache_ttl_seconds: float = 60
+    auth_user_cache_size: int = 100_000
+    password_hash_workers: int = 4
+    password_hash_queue_size: int = 64
+
+    vote_batch_max_size: int = 1000
+    vote_buffer_flush_seconds: float = 0
+
+    export_batch_size: int = 1000
+    import_token: str = ""
+    import_batch_size: int = 10_000
+
+    events_queue_size: int = 1000
+    events_coalesce_seconds: float = 1
+
+    slow_request_seconds: float = 1
+    log_level: str = "INFO"
+    log_json: bool = True
+    log_info_sample_rate: float = 1
+
+    timeline_fanout_max_followers: int = 10_000
+    timeline_backfill_posts: int = 100
+
+    cache_backend: Literal["memory", "redis", "none"] = "memory"
+    cache_ttl_seconds: float = 30
+    cache_max_entries: int = 100_000
+    redis_url: str = "redis://localhost:6379/0"
 
     model_config = SettingsConfigDict(
         env_file=(".env", ".env.prod"), env_file_encoding="utf-8"
@@ -4,3 +4,19 @@ from enum import Enum
 class VoteType(str, Enum):
     LIKE = "like"
     DISLIKE = "dislike"
+
+
+class SearchMode(str, Enum):
+    SUBSTRING = "substring"
+    FULLTEXT = "fulltext"
+
+
+class ImportKind(str, Enum):
+    USERS = "users"
+    POSTS = "posts"
+    VOTES = "votes"
+
+
+class ImportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
@@ -0,0 +1,123 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+import asyncpg
+import httpx
+import pytest
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.create_app import create_app
+from src.db.session import async_session, engine
+from src.db_models import Post, User
+from src.settings import settings
+from src.oauth2.core import create_access_token
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def db() -> AsyncIterator[AsyncSession]:
+    """
+    Session on the configured database, test is skipped if it is unreachable
+    or not migrated. Users made by 'make_user' are deleted afterwards.
+    """
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(select(User.id).limit(1))
+    except (OSError, SQLAlchemyError) as e:
+        await engine.dispose()
+        pytest.skip(f"No database: {e}")
+
+    async with async_session() as session:
+        yield session
+
+    # Every test runs in its own event loop, pooled connections can't outlive it.
+    await engine.dispose()
+
+
+@pytest.fixture
+async def make_user(db: AsyncSession) -> AsyncIterator[Callable[[], Awaitable[Any]]]:
+    """Creates users, returns (user_id, headers with their access token)."""
+    user_ids = []
+
+    async def make() -> tuple[int, dict[str, str]]:
+        res = await db.execute(
+            insert(User)
+            .values(username=f"test-{len(user_ids)}-{id(user_ids)}", password="-")
+            .returning(User.id)
+        )
+        user_id = res.scalar_one()
+        await db.commit()
+        user_ids.append(user_id)
+        token = create_access_token({"user_id": user_id})
+        return user_id, {"Authorization": f"Bearer {token}"}
+
+    yield make
+
+    # Posts and votes of the users go with them.
+    await db.execute(delete(User).where(User.id.in_(user_ids)))
+    await db.commit()
+
+
+@pytest.fixture
+async def make_posts(db: AsyncSession) -> Callable[..., Awaitable[list[int]]]:
+    async def make(owner_id: int, count: int, content: str = "test") -> list[int]:
+        res = await db.execute(
+            insert(Post)
+            .values([{"owner_id": owner_id, "content": content}] * count)
+            .returning(Post.id)
+        )
+        post_ids = list(res.scalars())
+        await db.commit()
+        return post_ids
+
+    return make
+
+
+@pytest.fixture
+async def client(db: AsyncSession) -> AsyncIterator[httpx.AsyncClient]:
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+@pytest.fixture
+def statements() -> Any:
+    """Counts statements executed by the primary engine."""
+    executed: list[str] = []
+
+    def count(conn, cursor, statement, parameters, context, many) -> None:
+        executed.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+
+@pytest.fixture
+def listen(db: AsyncSession) -> Any:
+    """Makes context with queue of payloads sent to a channel meanwhile."""
+
+    @asynccontextmanager
+    async def listen_to(channel: str) -> AsyncIterator[asyncio.Queue]:
+        conn = await asyncpg.connect(
+            host=settings.postgres_host,
+            port=int(settings.postgres_port),
+            user=settings.postgres_user,
+            password=settings.postgres_password,
+            database=settings.postgres_database_name,
+        )
+        payloads: asyncio.Queue = asyncio.Queue()
+        await conn.add_listener(channel, lambda *args: payloads.put_nowait(args[-1]))
+        try:
+            yield payloads
+        finally:
+            await conn.close()
+
+    return listen_to
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from src.oauth2.cache import known_user_key, known_users
+from src.api.auth.core import delete_user
+from src.api.events.hub import event_hub
+from src.api.events.utils import CACHE_CHANNEL, publish_invalidations
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_deleted_user_is_announced_to_other_workers(db, make_user, listen):
+    user_id, _ = await make_user()
+
+    async with listen(CACHE_CHANNEL) as invalidations:
+        await delete_user(user_id, db)
+        keys = (await invalidations.get()).split(" ")
+
+    assert known_user_key(user_id) in keys
+
+
+async def test_users_deleted_by_other_workers_are_forgotten(db, make_user):
+    user_id, _ = await make_user()
+
+    await event_hub.start()
+    try:
+        while not event_hub.listening:
+            await asyncio.sleep(0.01)
+        known_users.add(user_id)
+
+        # What another worker sends when it deletes the user.
+        await publish_invalidations([known_user_key(user_id)], db)
+        await db.commit()
+
+        for _ in range(100):
+            if user_id not in known_users:
+                break
+            await asyncio.sleep(0.01)
+        assert user_id not in known_users
+    finally:
+        await event_hub.stop()
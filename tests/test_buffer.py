@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from src.db_models import Vote
+from src.utils_classes import VoteType
+from src.api.posts import buffer
+from src.api.posts.buffer import VoteBuffer
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_stop_waits_for_flush_in_progress(db, make_user, make_posts, monkeypatch):
+    owner_id, _ = await make_user()
+    user_id, _ = await make_user()
+    [post_id] = await make_posts(owner_id, 1)
+    flushing = asyncio.Event()
+
+    async def slow_apply_votes(votes, db, strict=True):
+        flushing.set()
+        await asyncio.sleep(0.2)
+        return await apply_votes(votes, db, strict)
+
+    apply_votes = buffer.apply_votes
+    monkeypatch.setattr(buffer, "apply_votes", slow_apply_votes)
+    vote_buffer = VoteBuffer(0.01)
+    vote_buffer.add(user_id, post_id, VoteType.LIKE)
+    await vote_buffer.start()
+    await flushing.wait()
+
+    await vote_buffer.stop()
+
+    assert vote_buffer.stats() == {"pending": 0, "flushed": 1, "dropped": 0}
+    res = await db.execute(select(Vote.vote_type).where(Vote.user_id == user_id))
+    assert res.scalars().all() == [VoteType.LIKE]
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from src.cache import MISSING, cache
+from src.api.events.hub import event_hub
+from src.api.events.utils import CACHE_CHANNEL, publish_invalidations
+from src.api.posts.utils import post_cache_key, vote_cache_key
+
+
+pytestmark = [
+    pytest.mark.anyio,
+    pytest.mark.skipif(cache.shared, reason="Cache is shared by workers."),
+]
+
+
+async def test_writes_tell_other_workers_what_changed(
+    client, make_user, make_posts, listen
+):
+    owner_id, owner_headers = await make_user()
+    user_id, headers = await make_user()
+    [post_id] = await make_posts(owner_id, 1)
+
+    async with listen(CACHE_CHANNEL) as invalidations:
+        res = await client.patch(
+            f"/posts/{post_id}", json={"content": "edited"}, headers=owner_headers
+        )
+        assert res.status_code == 200
+        assert await invalidations.get() == post_cache_key(post_id)
+
+        res = await client.post(f"/posts/{post_id}/like", headers=headers)
+        assert res.status_code == 204
+        keys = (await invalidations.get()).split(" ")
+        assert keys == [post_cache_key(post_id), vote_cache_key(post_id, user_id)]
+
+
+async def test_changes_of_other_workers_are_dropped(db, make_user, make_posts):
+    owner_id, _ = await make_user()
+    [post_id] = await make_posts(owner_id, 1)
+    key = post_cache_key(post_id)
+
+    await event_hub.start()
+    try:
+        while not event_hub.listening:
+            await asyncio.sleep(0.01)
+        await cache.set(key, {"id": post_id, "content": "stale"})
+
+        # What another worker sends when it changes the post.
+        await publish_invalidations(["other", key], db)
+        await db.commit()
+
+        for _ in range(100):
+            if await cache.get(key) is MISSING:
+                break
+            await asyncio.sleep(0.01)
+        assert await cache.get(key) is MISSING
+    finally:
+        await event_hub.stop()
+
+
+async def test_failed_invalidations_are_not_left_behind(monkeypatch):
+    started = asyncio.Event()
+
+    async def invalidate(*keys):
+        started.set()
+        await asyncio.sleep(0.01)
+        raise ConnectionError("cache is gone")
+
+    monkeypatch.setattr(cache, "invalidate", invalidate)
+    event_hub.on_invalidation(None, 0, CACHE_CHANNEL, "post:1 post:2")
+    await started.wait()
+    assert len(event_hub.invalidating) == 1
+
+    await event_hub.stop()
+    assert not event_hub.invalidating
@@ -0,0 +1,30 @@
+import asyncio
+import orjson
+import pytest
+
+from src.api.events.utils import CHANNEL
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize(
+    "content, sent",
+    [
+        ("short", True),
+        ('"\n' * 2000, False),
+        ("\x01" * 1400, False),
+        ("x" * 7000, True),
+    ],
+)
+async def test_post_event_fits_notify(client, make_user, listen, content, sent):
+    _, headers = await make_user()
+
+    async with listen(CHANNEL) as events:
+        res = await client.post("/posts", json={"content": content}, headers=headers)
+        assert res.status_code == 201
+        event = orjson.loads(await asyncio.wait_for(events.get(), 5))
+
+    assert event["type"] == "post_created"
+    assert event["post"]["id"] == res.json()["id"]
+    assert event["post"]["content"] == (content if sent else None)
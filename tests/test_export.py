@@ -0,0 +1,32 @@
+import orjson
+import pytest
+from sqlalchemy import func, select
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_export_since_streams_changed_posts(client, db, make_user, make_posts):
+    owner_id, owner = await make_user()
+    _, voter = await make_user()
+    edited, voted, unchanged = await make_posts(owner_id, 3)
+    since = await db.scalar(select(func.now()))
+    await db.commit()
+
+    res = await client.patch(
+        f"/posts/{edited}", json={"content": "edited"}, headers=owner
+    )
+    assert res.status_code == 200
+    res = await client.post(f"/posts/{voted}/like", headers=voter)
+    assert res.status_code == 204
+
+    res = await client.get(
+        "/posts/export", params={"since": since.isoformat()}, headers=voter
+    )
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/x-ndjson"
+    posts = [orjson.loads(line) for line in res.text.splitlines()]
+    ours = [post for post in posts if post["id"] in (edited, voted, unchanged)]
+    assert [post["id"] for post in ours] == [edited, voted]
+    assert ours[0]["content"] == "edited"
+    assert ours[1]["like_count"] == 1
@@ -0,0 +1,78 @@
+import orjson
+import pytest
+from pydantic import BaseModel
+from sqlalchemy import select
+
+from src.db_models import Post, User
+from src.settings import settings
+from src.utils_classes import ImportFormat, ImportKind
+from src.api.imports import core
+from src.api.imports.core import import_records
+
+
+pytestmark = pytest.mark.anyio
+
+
+def ndjson(*records: dict) -> list[str]:
+    return [orjson.dumps(record).decode() + "\n" for record in records]
+
+
+async def test_nul_characters_are_rejected_per_record(db, make_user):
+    user_id, _ = await make_user()
+    username = await db.scalar(select(User.username).where(User.id == user_id))
+    lines = ndjson(
+        {"username": username, "content": "first"},
+        {"username": username, "content": "bad\u0000content"},
+        {"username": username, "content": "third"},
+    )
+
+    result = await import_records(ImportKind.POSTS, lines, ImportFormat.NDJSON, db)
+
+    assert result["imported"] == 2
+    assert result["ids"][1] is None
+    assert [error["line"] for error in result["errors"]] == [2]
+    assert "NUL" in result["errors"][0]["detail"]
+
+
+async def test_batch_rejected_by_database_is_retried_per_record(
+    db, make_user, monkeypatch
+):
+    class UncheckedPost(BaseModel):
+        username: str
+        content: str
+        created_at: None = None
+
+    # Without validation the NUL character reaches the database.
+    monkeypatch.setitem(
+        core.IMPORTERS,
+        ImportKind.POSTS,
+        (UncheckedPost, core.IMPORTERS[ImportKind.POSTS][1]),
+    )
+    user_id, _ = await make_user()
+    username = await db.scalar(select(User.username).where(User.id == user_id))
+    lines = ndjson(
+        {"username": username, "content": "first"},
+        {"username": username, "content": "bad\u0000content"},
+        {"username": username, "content": "third"},
+    )
+
+    result = await import_records(ImportKind.POSTS, lines, ImportFormat.NDJSON, db)
+
+    assert result["imported"] == 2
+    assert [error["line"] for error in result["errors"]] == [2]
+    assert result["errors"][0]["detail"].startswith("Rejected by database")
+    res = await db.execute(select(Post.content).where(Post.owner_id == user_id))
+    assert sorted(res.scalars()) == ["first", "third"]
+    res = await db.execute(select(User.post_count).where(User.id == user_id))
+    assert res.scalar() == 2
+
+
+@pytest.mark.parametrize("token", [b"wrong", "caf\u00e9".encode("latin-1")])
+async def test_wrong_import_tokens_are_forbidden(client, monkeypatch, token):
+    monkeypatch.setattr(settings, "import_token", "secret")
+
+    res = await client.post(
+        "/import/posts", content=b"", headers={"X-Import-Token": token}
+    )
+
+    assert res.status_code == 403
@@ -0,0 +1,245 @@
+import asyncio
+import random
+import string
+from base64 import urlsafe_b64encode
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+
+from src.db_models import Post, Vote
+from src.utils_classes import VoteType
+from src.api.posts.utils import get_vote_count_drift
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_feed_statements_do_not_grow_with_page_size(
+    client, make_user, make_posts, statements
+):
+    owner_id, _ = await make_user()
+    _, headers = await make_user()
+    await make_posts(owner_id, 50)
+
+    counts = []
+    for limit in (2, 50):
+        statements.clear()
+        res = await client.get("/posts", params={"limit": limit}, headers=headers)
+        assert res.status_code == 200
+        assert len(res.json()) == limit
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
+
+
+async def test_feed_pages_follow_cursor(client, make_user, make_posts):
+    owner_id, headers = await make_user()
+    word = uuid4().hex
+    # Posts made in one statement have the same 'created_at', ids break ties.
+    post_ids = await make_posts(owner_id, 5, word)
+    newest_first = sorted(post_ids, reverse=True)
+
+    pages, cursor = [], None
+    while True:
+        params = {"query": word, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        res = await client.get("/posts", params=params, headers=headers)
+        assert res.status_code == 200
+        pages.append([post["id"] for post in res.json()])
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert pages == [newest_first[:2], newest_first[2:4], newest_first[4:]]
+
+    # Page which is exactly the rest has no cursor.
+    res = await client.get(
+        "/posts", params={"query": word, "limit": 5}, headers=headers
+    )
+    assert [post["id"] for post in res.json()] == newest_first
+    assert "X-Next-Cursor" not in res.headers
+
+
+async def test_new_posts_do_not_shift_next_pages(client, make_user, make_posts):
+    owner_id, headers = await make_user()
+    word = uuid4().hex
+    older = sorted(await make_posts(owner_id, 4, word), reverse=True)
+
+    params = {"query": word, "limit": 2}
+    res = await client.get("/posts", params=params, headers=headers)
+    assert [post["id"] for post in res.json()] == older[:2]
+    await make_posts(owner_id, 3, word)
+
+    params["cursor"] = res.headers["X-Next-Cursor"]
+    res = await client.get("/posts", params=params, headers=headers)
+    assert [post["id"] for post in res.json()] == older[2:]
+    assert "X-Next-Cursor" not in res.headers
+
+
+async def test_fulltext_search_ranks_by_relevance(client, make_user, make_posts):
+    owner_id, headers = await make_user()
+    word = "".join(random.choices(string.ascii_lowercase, k=16))
+    [frequent] = await make_posts(owner_id, 1, f"{word} {word} {word}")
+    # Newer, so it would come first if posts were not ranked.
+    [rare] = await make_posts(owner_id, 1, f"Pineapples on pizza, {word} says.")
+
+    found = []
+    for query in (word, f"{word} -pineapple", f'"pizza {word}"'):
+        params = {"query": query, "search": "fulltext"}
+        res = await client.get("/posts", params=params, headers=headers)
+        assert res.status_code == 200
+        found.append([post["id"] for post in res.json()])
+    assert found == [[frequent, rare], [frequent], [rare]]
+
+    params = {"query": word, "search": "fulltext", "cursor": "anything"}
+    res = await client.get("/posts", params=params, headers=headers)
+    assert res.status_code == 422
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"limit": 0},
+        {"limit": -1},
+        {"limit": 101},
+        {"offset": -1},
+        {"cursor": "nonsense"},
+        {
+            "cursor": urlsafe_b64encode(
+                f"2020-01-01T00:00:00+00:00|{2**31}".encode()
+            ).decode()
+        },
+    ],
+)
+async def test_feed_rejects_bad_page_parameters(client, make_user, params):
+    _, headers = await make_user()
+
+    res = await client.get("/posts", params=params, headers=headers)
+    assert res.status_code == 422
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"limit": 0},
+        {"limit": 101},
+        {"cursor": urlsafe_b64encode(f"1.5|{2**31}".encode()).decode()},
+    ],
+)
+async def test_trending_rejects_bad_page_parameters(client, make_user, params):
+    _, headers = await make_user()
+
+    res = await client.get("/posts/trending", params=params, headers=headers)
+    assert res.status_code == 422
+
+
+async def test_vote_counters_follow_votes(client, db, make_user, make_posts):
+    owner_id, _ = await make_user()
+    _, first = await make_user()
+    _, second = await make_user()
+    [post_id] = await make_posts(owner_id, 1)
+
+    counts = []
+    for headers, vote_type in [
+        (first, "like"),
+        (second, "dislike"),
+        (first, "dislike"),
+        (second, "dislike"),
+    ]:
+        res = await client.post(f"/posts/{post_id}/{vote_type}", headers=headers)
+        assert res.status_code == 204
+        res = await client.get(f"/posts/{post_id}", headers=headers)
+        counts.append((res.json()["like_count"], res.json()["dislike_count"]))
+    # Voting the other way switches the vote, the same way takes it back.
+    assert counts == [(1, 0), (1, 1), (0, 2), (0, 1)]
+
+    res = await client.delete("/auth", headers=first)
+    assert res.status_code == 204
+    res = await db.execute(
+        select(Post.like_count, Post.dislike_count).where(Post.id == post_id)
+    )
+    assert res.one() == (0, 0)
+    assert await get_vote_count_drift(db) == []
+
+
+async def test_concurrent_toggles_of_one_vote(client, db, make_user, make_posts):
+    owner_id, _ = await make_user()
+    user_id, headers = await make_user()
+    [post_id] = await make_posts(owner_id, 1)
+
+    # Odd number of likes, so the like stays.
+    responses = await asyncio.gather(
+        *(client.post(f"/posts/{post_id}/like", headers=headers) for _ in range(201))
+    )
+    assert {res.status_code for res in responses} == {204}
+
+    res = await db.execute(select(Vote.vote_type).where(Vote.user_id == user_id))
+    assert res.scalars().all() == [VoteType.LIKE]
+    res = await db.execute(
+        select(Post.like_count, Post.dislike_count).where(Post.id == post_id)
+    )
+    assert res.one() == (1, 0)
+    assert await get_vote_count_drift(db) == []
+
+
+@pytest.mark.parametrize(
+    "if_modified_since, status_code",
+    [
+        ("Mon, 20 Nov 2000 19:12:08 GMT", 200),
+        ("Mon, 20 Nov 2000 19:12:08 -0000", 200),
+        ("Mon, 20 Nov 2000 19:12:08", 200),
+        ("Fri, 01 Jan 9999 00:00:00 -0000", 304),
+        ("Fri, 01 Jan 9999 00:00:00", 304),
+        ("yesterday", 200),
+    ],
+)
+async def test_single_post_if_modified_since(
+    client, make_user, make_posts, if_modified_since, status_code
+):
+    user_id, headers = await make_user()
+    [post_id] = await make_posts(user_id, 1)
+
+    res = await client.get(
+        f"/posts/{post_id}",
+        headers={**headers, "If-Modified-Since": if_modified_since},
+    )
+    assert res.status_code == status_code
+
+
+async def test_single_post_not_modified_until_it_changes(client, make_user, make_posts):
+    owner_id, _ = await make_user()
+    _, headers = await make_user()
+    [post_id] = await make_posts(owner_id, 1)
+
+    res = await client.get(f"/posts/{post_id}", headers=headers)
+    etag, last_modified = res.headers["ETag"], res.headers["Last-Modified"]
+    for conditions in ({"If-None-Match": etag}, {"If-Modified-Since": last_modified}):
+        res = await client.get(f"/posts/{post_id}", headers={**headers, **conditions})
+        assert res.status_code == 304
+        assert res.content == b""
+        assert res.headers["ETag"] == etag
+
+    res = await client.post(f"/posts/{post_id}/like", headers=headers)
+    assert res.status_code == 204
+    res = await client.get(
+        f"/posts/{post_id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert res.status_code == 200
+    assert res.json()["like_count"] == 1
+    assert res.headers["ETag"] != etag
+
+
+async def test_post_list_not_modified_until_it_changes(client, make_user, make_posts):
+    owner_id, owner = await make_user()
+    await make_posts(owner_id, 2)
+    url = f"/users/{owner_id}/posts"
+
+    res = await client.get(url, headers=owner)
+    etag = res.headers["ETag"]
+    res = await client.get(url, headers={**owner, "If-None-Match": etag})
+    assert res.status_code == 304
+
+    res = await client.post("/posts", json={"content": "new"}, headers=owner)
+    assert res.status_code == 201
+    res = await client.get(url, headers={**owner, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert len(res.json()) == 3
@@ -0,0 +1,44 @@
+from fastapi import Response
+
+from src.db import replicas
+from src.db.replicas import PRIMARY_COOKIE, ReplicaRouter, primary_until
+
+
+def make_router() -> ReplicaRouter:
+    router = ReplicaRouter(["replica:5432"])
+    router.replicas[0].healthy = True
+    return router
+
+
+def test_writer_reads_from_primary_on_every_worker():
+    writing, other = make_router(), make_router()
+    response = Response()
+
+    writing.stick_to_primary(1, response)
+
+    cookie = response.headers["set-cookie"]
+    assert cookie.startswith(f"{PRIMARY_COOKIE}=")
+    until = primary_until(cookie.split(";")[0].split("=")[1])
+    assert writing.choose(1) is None
+    assert other.choose(1, until) is None
+    assert other.choose(1) is other.replicas[0]
+    assert other.choose(2) is other.replicas[0]
+
+
+def test_cookie_rounded_up_still_sticks(monkeypatch):
+    # The cookie keeps milliseconds, this time is rounded up in it.
+    monkeypatch.setattr(replicas, "time", lambda: 1_700_000_000.0009)
+    writing, other = make_router(), make_router()
+    response = Response()
+
+    writing.stick_to_primary(1, response)
+
+    until = primary_until(response.headers["set-cookie"].split(";")[0].split("=")[1])
+    assert other.choose(1, until) is None
+
+
+def test_made_up_cookies_are_ignored():
+    router = make_router()
+
+    for value in (None, "", "soon", "inf", "nan", "1", "99999999999"):
+        assert router.choose(1, primary_until(value)) is router.replicas[0]
@@ -0,0 +1,48 @@
+import pytest
+
+from src.settings import settings
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_posts_not_fanned_out_stay_after_author_falls_under_threshold(
+    client, make_user, monkeypatch
+):
+    monkeypatch.setattr(settings, "timeline_fanout_max_followers", 1)
+    author_id, author = await make_user()
+    _, follower = await make_user()
+    _, leaving = await make_user()
+    for headers in (follower, leaving):
+        res = await client.post(f"/users/{author_id}/follow", headers=headers)
+        assert res.status_code == 204
+
+    # Two followers are over the threshold, the post is not fanned out.
+    res = await client.post("/posts", json={"content": "popular"}, headers=author)
+    popular_id = res.json()["id"]
+    res = await client.delete(f"/users/{author_id}/follow", headers=leaving)
+    assert res.status_code == 204
+    res = await client.post("/posts", json={"content": "later"}, headers=author)
+    later_id = res.json()["id"]
+
+    res = await client.get("/users/me/timeline", headers=follower)
+    assert [post["id"] for post in res.json()] == [later_id, popular_id]
+
+
+async def test_posts_of_author_over_threshold_are_on_new_followers_timeline(
+    client, make_user, make_posts, monkeypatch
+):
+    monkeypatch.setattr(settings, "timeline_fanout_max_followers", 1)
+    author_id, _ = await make_user()
+    _, first = await make_user()
+    _, second = await make_user()
+    [post_id] = await make_posts(author_id, 1)
+
+    for headers in (first, second):
+        res = await client.post(f"/users/{author_id}/follow", headers=headers)
+        assert res.status_code == 204
+
+    # The second follower is over the threshold, the post is not backfilled.
+    for headers in (first, second):
+        res = await client.get("/users/me/timeline", headers=headers)
+        assert [post["id"] for post in res.json()] == [post_id]
@@ -0,0 +1,53 @@
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_user_posts_pages(client, make_user, make_posts):
+    owner_id, headers = await make_user()
+    other_id, _ = await make_user()
+    newest_first = sorted(await make_posts(owner_id, 3), reverse=True)
+    await make_posts(other_id, 2)
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        res = await client.get(
+            f"/users/{owner_id}/posts", params=params, headers=headers
+        )
+        assert res.status_code == 200
+        pages.append([post["id"] for post in res.json()])
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert pages == [newest_first[:2], newest_first[2:]]
+
+    res = await client.get(
+        f"/users/{owner_id}/posts", params={"limit": 0}, headers=headers
+    )
+    assert res.status_code == 422
+
+
+async def test_posts_of_users_without_posts(client, make_user):
+    user_id, headers = await make_user()
+
+    res = await client.get(f"/users/{user_id}/posts", headers=headers)
+    assert res.status_code == 200
+    assert res.json() == []
+
+    res = await client.get(f"/users/{2**31 - 1}/posts", headers=headers)
+    assert res.status_code == 404
+
+
+async def test_post_count_follows_posts(client, make_user):
+    user_id, headers = await make_user()
+    post_ids = []
+    for content in ("first", "second"):
+        res = await client.post("/posts", json={"content": content}, headers=headers)
+        post_ids.append(res.json()["id"])
+    res = await client.delete(f"/posts/{post_ids[0]}", headers=headers)
+    assert res.status_code == 204
+
+    res = await client.get(f"/users/{user_id}", headers=headers)
+    assert res.json()["post_count"] == 1